@@ -0,0 +1,284 @@
+import os
+import glob
+import json
+import time
+import threading
+import functools
+
+import ocr
+import utils
+import pipeline
+
+from utils import message
+from storage import Storage
+from parsers import history
+from concurrent.futures import ThreadPoolExecutor
+
+
+def find_files(
+        source: str
+) -> list[str]:
+    """
+    Resolves a directory or a glob pattern to the PDF files it contains.
+
+    Parameters:
+        source (str): Directory path or glob pattern (e.g. "./pdf/2025-06*.pdf")
+
+    Returns:
+        list[str]: Sorted paths of the matching PDF files
+    """
+    pattern: str = os.path.join(source, '*.pdf') if os.path.isdir(source) else source
+    return sorted(
+        path for path in glob.glob(
+            pathname=pattern
+        ) if path.lower().endswith('.pdf') and os.path.isfile(path)
+    )
+
+
+def stage(
+        movements: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ],
+        pdf_path: str,
+        stage_dir: str
+) -> str:
+    """
+    Writes the movements of a file as JSON for review instead of inserting them.
+
+    The name ends with the start of the PDF content hash, so statements
+    with the same name in different directories don't overwrite each other.
+
+    Returns:
+        str: Path of the staged file
+    """
+    os.makedirs(
+        name=stage_dir,
+        exist_ok=True
+    )
+    pdf_hash: str = ocr.Cache.fingerprint(
+        pdf_path=pdf_path
+    )
+    staged_path: str = os.path.join(
+        stage_dir,
+        f'{os.path.splitext(os.path.basename(pdf_path))[0]}-{pdf_hash[:12]}.json'
+    )
+    with open(
+            file=staged_path,
+            mode='w',
+            encoding='utf-8'
+    ) as f:
+        json.dump(
+            obj=movements,
+            fp=f,
+            ensure_ascii=False,
+            indent=2
+        )
+    return staged_path
+
+
+def load_history(
+        storage: Storage
+) -> None:
+    """
+    Loads the counterparty history index once before the files are processed.
+    """
+    message(
+        module=storage.name,
+        code=-1,
+        args=f'{history.index().load(storage=storage)} known counterparties loaded.'
+    )
+
+
+def process(
+        pdf_path: str,
+        app_info,
+        storage: Storage | None,
+        cache: ocr.Cache | None,
+        confirm: bool,
+        stage_dir: str
+) -> dict:
+    """
+    Extracts one file and inserts or stages its movements.
+
+    Returns:
+        dict: The file, its status, page and movement counts and the seconds spent per stage
+    """
+    result: dict = {
+        'file': pdf_path,
+        'status': 'ok',
+        'pages': 0,
+        'movements': 0,
+        'timings': {}
+    }
+    try:
+        ocr_report: dict[str, int] = {}
+        movements = pipeline.run(
+            pages=ocr.pages(
+                pdf_path=pdf_path,
+                settings=app_info['ocr'],
+                cache=cache,
+                profile=functools.partial(
+                    utils.ocr_profile,
+                    app_info
+                ),
+                report=ocr_report
+            ),
+            app_info=app_info,
+            conn=storage,
+            depth=app_info['pipeline']['depth'],
+            batch_size=app_info['pipeline']['batch_size'],
+            timings=result['timings']
+        )
+        result['pages'] = ocr_report.get('pages', 0)
+
+        if movements is None:
+            result['status'] = 'no parser'
+            return result
+        result['movements'] = len(movements)
+
+        start = time.perf_counter()
+        if confirm and storage:
+            report = utils.insert_db(
+                args=movements,
+                conn=storage,
+                chunk_size=app_info['insert']['chunk_size'],
+                mode=app_info['insert']['mode']
+            )
+            if report is None:
+                result['status'] = 'error: insert failed'
+            elif report['failed']:
+                result['status'] = f'inserted {len(report["inserted"])} of {report["rows"]} rows'
+            else:
+                result['status'] = 'inserted'
+        else:
+            result['status'] = f'staged -> {stage(movements=movements, pdf_path=pdf_path, stage_dir=stage_dir)}'
+        result['timings']['store'] = time.perf_counter() - start
+    except Exception as e:
+        result['status'] = f'error: {e}'
+    return result
+
+
+def run(
+        source: str,
+        app_info,
+        storage: Storage | None,
+        cache: ocr.Cache | None,
+        workers: int,
+        confirm: bool,
+        stage_dir: str
+) -> list[dict]:
+    """
+    Ingests every PDF of a directory or glob without any prompt.
+
+    Parameters:
+        source (str): Directory path or glob pattern
+        app_info: Application configuration information (loaded from config.json)
+        storage (Storage | None): Storage backend, None to run without database
+        cache (ocr.Cache | None): OCR cache
+        workers (int): Number of files processed at the same time
+        confirm (bool): Insert the movements in the database instead of staging them as JSON
+        stage_dir (str): Directory the staged JSON files are written to
+
+    Returns:
+        list[dict]: One result per file, see process()
+
+    Each file still uses ocr.workers processes for its own pages, so the total
+    OCR processes are up to workers * ocr.workers.
+    """
+    files: list[str] = find_files(
+        source=source
+    )
+    if not files:
+        message(
+            module='batch',
+            code=1004,
+            args=f'No pdf files found in "{source}".'
+        )
+        return []
+
+    message(
+        module='batch',
+        code=-1,
+        args=f'{len(files)} files found, processing with {workers} workers...'
+    )
+    if storage:
+        load_history(
+            storage=storage
+        )
+
+    start = time.perf_counter()
+    lock = threading.Lock()
+    finished: list[int] = [0]
+
+    def job(
+            pdf_path: str
+    ) -> dict:
+        result = process(
+            pdf_path=pdf_path,
+            app_info=app_info,
+            storage=storage,
+            cache=cache,
+            confirm=confirm,
+            stage_dir=stage_dir
+        )
+        with lock:
+            finished[0] += 1
+            message(
+                module='batch',
+                code=-1,
+                args=f'({finished[0]}/{len(files)}) {os.path.basename(pdf_path)}: {result["status"]}'
+            )
+        return result
+
+    with ThreadPoolExecutor(
+            max_workers=max(workers, 1)
+    ) as executor:
+        results: list[dict] = list(
+            executor.map(
+                job,
+                files
+            )
+        )
+
+    summary(
+        results=results,
+        wall=time.perf_counter() - start
+    )
+    return results
+
+
+def summary(
+        results: list[dict],
+        wall: float
+) -> None:
+    """
+    Prints the totals of a batch run.
+    """
+    stages: dict[str, float] = {}
+    for result in results:
+        for name, seconds in result['timings'].items():
+            stages[name] = stages.get(name, 0.0) + seconds
+
+    failed: int = sum(
+        1 for result in results if result['status'].startswith(('error', 'no parser'))
+    )
+    message(
+        module='batch',
+        code=-1,
+        args=(
+            f'Files: {len(results)} ({failed} failed), '
+            f'Pages: {sum(result["pages"] for result in results)}, '
+            f'Movements: {sum(result["movements"] for result in results)}, '
+            f'Wall time: {wall:.2f}s'
+        )
+    )
+    message(
+        module='batch',
+        code=-1,
+        args='Time per stage (summed over files): ' + ', '.join(
+            f'{name}: {seconds:.2f}s' for name, seconds in stages.items()
+        )
+    )
@@ -0,0 +1,90 @@
+"""
+Compares per-line and batched category prediction on a large synthetic statement.
+
+The model is called directly, without the prediction cache, so both modes
+really run the classifier on every line.
+
+Usage:
+    python -m benchmarks.classify --lines 20000
+"""
+import re
+import json
+import time
+import random
+import argparse
+
+from parsers import model
+
+
+def synthetic_lines(
+        count: int,
+        seed: int = 42
+) -> list[str]:
+    """
+    Builds statement lines from the training descriptions with random dates, ids and amounts.
+    """
+    with open(
+            file=model.TRAINING_PATH,
+            mode='r',
+            encoding='utf-8'
+    ) as f:
+        descriptions: list[str] = [
+            item['description'] for item in json.load(f)
+        ]
+
+    generator = random.Random(seed)
+    lines: list[str] = []
+    for _ in range(count):
+        line: str = generator.choice(descriptions)
+        line = re.sub(r'\d{9,}', lambda _: str(generator.randrange(10 ** 11, 10 ** 12)), line)
+        line = re.sub(r'\d+,\d{2}', lambda _: f'{generator.randrange(1, 5000)},{generator.randrange(100):02d}', line)
+        line = re.sub(r'^\d{2}-\d{2}', f'{generator.randrange(1, 29):02d}-{generator.randrange(1, 13):02d}', line)
+        lines.append(line)
+    return lines
+
+
+def main(
+
+) -> None:
+    arg_parser = argparse.ArgumentParser(
+        description='Per-line vs batched category prediction.'
+    )
+    arg_parser.add_argument('--lines', type=int, default=20000)
+    arg_parser.add_argument('--batch-size', type=int, default=0, help='0 classifies all lines in one call')
+    args = arg_parser.parse_args()
+
+    pipeline = model.load()
+    lines: list[str] = synthetic_lines(
+        count=args.lines
+    )
+
+    start = time.perf_counter()
+    per_line: list[str] = [
+        str(
+            pipeline.predict(
+                X=[line]
+            )[0]
+        ) for line in lines
+    ]
+    per_line_seconds = time.perf_counter() - start
+
+    size: int = args.batch_size or len(lines)
+    start = time.perf_counter()
+    batched: list[str] = []
+    for i in range(0, len(lines), size):
+        batched.extend(
+            str(category_name) for category_name in pipeline.predict(
+                X=lines[i:i + size]
+            )
+        )
+    batched_seconds = time.perf_counter() - start
+
+    assert per_line == batched, 'batched prediction differs from per-line prediction'
+    print(f'{"mode":>10} {"seconds":>9} {"lines/s":>11}')
+    print(f'{"per-line":>10} {per_line_seconds:>9.2f} {len(lines) / per_line_seconds:>11.0f}')
+    print(f'{"batched":>10} {batched_seconds:>9.2f} {len(lines) / batched_seconds:>11.0f}')
+    print(f'speedup: {per_line_seconds / batched_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
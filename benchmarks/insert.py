@@ -0,0 +1,143 @@
+"""
+Measures movement insert throughput per chunk size.
+
+With MySQL (the MYSQL_* variables of .env), the rows go to a TEMPORARY
+TABLE created LIKE movements, so nothing is left behind in the real
+table. With SQLite, every chunk size gets a fresh file in a temporary
+directory, no server needed.
+
+Usage:
+    python -m benchmarks.insert --rows 20000 --chunk-sizes 1,50,500,2000 --mode values
+    python -m benchmarks.insert --backend sqlite
+"""
+import os
+import random
+import argparse
+import tempfile
+
+import dotenv
+import loader
+import storage
+import mysql.connector
+
+from typing import Iterator
+
+
+def synthetic_movements(
+        count: int,
+        seed: int = 42
+) -> list[
+    dict[
+        str,
+        str | int | float | None
+    ]
+]:
+    generator = random.Random(seed)
+    return [
+        {
+            'transaction_id': generator.randrange(10 ** 11, 10 ** 12),
+            'date': f'2025-{generator.randrange(1, 13):02d}-{generator.randrange(1, 29):02d}',
+            'description': None,
+            'value': round(generator.uniform(-5000, 5000), 2) or 1.0,
+            'counterparty': generator.choice(['MERCADO LIVRE', 'UBER', 'IFOOD', 'GUSTAVO RIBEIRO SILVA']),
+            'method': generator.choice(['PIX', 'DEBIT', 'CREDIT', 'REVENUE']),
+            'banks_id': 35555757,
+            'banks_name': 'Inter Brasil',
+            'cards_id': None,
+            'category_name': generator.choice(['FOOD', 'TRANSPORT', 'REPASS'])
+        } for _ in range(count)
+    ]
+
+
+def mysql_reports(
+        movements: list[dict],
+        chunk_sizes: list[int],
+        mode: str
+) -> Iterator[dict]:
+    dotenv.load_dotenv()
+    conn = mysql.connector.connect(
+        host=os.getenv('MYSQL_HOST'),
+        user=os.getenv('MYSQL_USER'),
+        port=int(os.getenv('MYSQL_PORT')),
+        password=os.getenv('MYSQL_PASSWORD'),
+        database=os.getenv('MYSQL_DATABASE'),
+        allow_local_infile=mode == 'infile'
+    )
+    try:
+        for chunk_size in chunk_sizes:
+            with conn.cursor() as cursor:
+                cursor.execute('DROP TEMPORARY TABLE IF EXISTS movements_bench')
+                cursor.execute('CREATE TEMPORARY TABLE movements_bench LIKE movements')
+            # Only the copy is migrated, movements itself is never altered here.
+            loader.migrate(
+                conn=conn,
+                table='movements_bench'
+            )
+            yield loader.insert(
+                movements=movements,
+                conn=conn,
+                chunk_size=chunk_size,
+                mode=mode,
+                table='movements_bench'
+            )
+    finally:
+        conn.close()
+
+
+def sqlite_reports(
+        movements: list[dict],
+        chunk_sizes: list[int]
+) -> Iterator[dict]:
+    with tempfile.TemporaryDirectory() as directory:
+        for chunk_size in chunk_sizes:
+            store = storage.SQLiteStorage(
+                path=os.path.join(
+                    directory,
+                    f'bench-{chunk_size}.sqlite3'
+                )
+            )
+            try:
+                yield store.insert(
+                    movements=movements,
+                    chunk_size=chunk_size
+                )
+            finally:
+                store.close()
+
+
+def main(
+
+) -> None:
+    arg_parser = argparse.ArgumentParser(
+        description='Insert rows/s per chunk size.'
+    )
+    arg_parser.add_argument('--rows', type=int, default=20000)
+    arg_parser.add_argument('--chunk-sizes', default='1,50,500,2000', help='comma separated chunk sizes')
+    arg_parser.add_argument('--mode', choices=loader.MODES, default='values', help='MySQL insert mode')
+    arg_parser.add_argument('--backend', choices=('mysql', 'sqlite'), default='mysql')
+    args = arg_parser.parse_args()
+
+    movements = synthetic_movements(
+        count=args.rows
+    )
+    chunk_sizes: list[int] = [int(size) for size in args.chunk_sizes.split(',')]
+    reports = mysql_reports(
+        movements=movements,
+        chunk_sizes=chunk_sizes,
+        mode=args.mode
+    ) if args.backend == 'mysql' else sqlite_reports(
+        movements=movements,
+        chunk_sizes=chunk_sizes
+    )
+
+    print(f'{args.rows} rows, backend {args.backend}' + (f', mode {args.mode}' if args.backend == 'mysql' else ''))
+    print(f'{"chunk":>7} {"chunks":>7} {"seconds":>9} {"rows/s":>9} {"failed":>7}')
+    for chunk_size, report in zip(chunk_sizes, reports):
+        print(
+            f'{chunk_size:>7} {report["chunks"]:>7} {report["seconds"]:>9.2f} '
+            f'{len(report["inserted"]) / report["seconds"]:>9.0f} {len(report["failed"]):>7}'
+        )
+
+
+if __name__ == '__main__':
+    main()
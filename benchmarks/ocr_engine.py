@@ -0,0 +1,84 @@
+"""
+Measures per-page OCR latency of each engine in ocr.engine.
+
+The pytesseract engine starts a tesseract process and reloads the
+traineddata on every call, the tesserocr engine keeps it loaded.
+
+Usage:
+    python -m benchmarks.ocr_engine ./pdf/statement.pdf --page 1 --repeat 10
+"""
+import os
+import json
+import time
+import argparse
+import statistics
+
+import ocr
+
+from ocr import engine
+
+
+def main(
+
+) -> None:
+    with open(
+            file=os.path.join(
+                os.path.dirname(os.path.dirname(__file__)),
+                'config.json'
+            ),
+            mode='r'
+    ) as f:
+        settings = json.load(f)['ocr']
+
+    arg_parser = argparse.ArgumentParser(
+        description='Per-page OCR latency per engine.'
+    )
+    arg_parser.add_argument('pdf_path')
+    arg_parser.add_argument('--page', type=int, default=1)
+    arg_parser.add_argument('--repeat', type=int, default=10)
+    arg_parser.add_argument('--dpi', type=int, default=settings['dpi'])
+    args = arg_parser.parse_args()
+
+    image = next(
+        ocr.stream(
+            dpi=args.dpi,
+            pdf_path=args.pdf_path,
+            pages=[args.page]
+        )
+    )
+
+    backends: list[str] = ['pytesseract']
+    if engine.tesserocr is not None:
+        backends.append('tesserocr')
+    else:
+        print('tesserocr is not installed, only the pytesseract engine is measured.')
+
+    print(f'{"engine":>12} {"mean ms":>9} {"p50 ms":>9} {"min ms":>9}')
+    for backend in backends:
+        ocr_engine = engine.create(
+            backend=backend,
+            lang=settings['lang'],
+            config=settings['config']
+        )
+        # The first call pays the model load of the persistent engine.
+        ocr_engine.image_to_string(
+            image=image
+        )
+
+        latencies: list[float] = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            ocr_engine.image_to_string(
+                image=image
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+        ocr_engine.close()
+
+        print(
+            f'{ocr_engine.name:>12} {statistics.mean(latencies):>9.1f} '
+            f'{statistics.median(latencies):>9.1f} {min(latencies):>9.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
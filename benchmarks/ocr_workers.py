@@ -0,0 +1,59 @@
+"""
+Measures OCR throughput as the number of worker processes grows.
+
+Usage:
+    python -m benchmarks.ocr_workers ./pdf/statement.pdf --max-workers 8
+"""
+import os
+import json
+import time
+import argparse
+
+import ocr
+
+
+def main(
+
+) -> None:
+    with open(
+            file=os.path.join(
+                os.path.dirname(os.path.dirname(__file__)),
+                'config.json'
+            ),
+            mode='r'
+    ) as f:
+        settings = json.load(f)['ocr']
+
+    arg_parser = argparse.ArgumentParser(
+        description='OCR throughput per worker count.'
+    )
+    arg_parser.add_argument('pdf_path')
+    arg_parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument('--dpi', type=int, default=settings['dpi'])
+    args = arg_parser.parse_args()
+
+    images = list(
+        ocr.stream(
+            dpi=args.dpi,
+            pdf_path=args.pdf_path
+        )
+    )
+    print(f'{len(images)} pages at {args.dpi} dpi')
+    print(f'{"workers":>8} {"seconds":>9} {"pages/s":>9} {"speedup":>8}')
+
+    baseline: float | None = None
+    for workers in range(1, args.max_workers + 1):
+        start = time.perf_counter()
+        ocr.run(
+            images=images,
+            workers=workers,
+            lang=settings['lang'],
+            config=settings['config']
+        )
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f'{workers:>8} {elapsed:>9.2f} {len(images) / elapsed:>9.2f} {baseline / elapsed:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
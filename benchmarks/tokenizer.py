@@ -0,0 +1,294 @@
+"""
+Replays the statement regression corpus through the bank parsers and measures lines/s.
+
+benchmarks/statements.json holds synthetic statements for every parsed
+runtype together with the movements the parsers returned for them. A
+run fails if any movement differs, so changes to the line tokenizers can
+be checked for identical output before their speed is compared. Only
+the line stages are exercised, categories are left to the classifier.
+The cards of the bills are looked up in a temporary SQLite storage.
+
+Usage:
+    python -m benchmarks.tokenizer --repeat 20
+    python -m benchmarks.tokenizer --update     (rewrites the expected movements)
+"""
+import os
+import re
+import json
+import time
+import random
+import argparse
+import tempfile
+
+import storage
+
+from parsers import registry
+
+CORPUS_PATH: str = os.path.join(
+    os.path.dirname(__file__),
+    'statements.json'
+)
+# Cards of the bill statements, Inter bills print the first and last four digits, Mercado Pago the last four.
+CARDS: list[int] = [
+    5502000000001234,
+    4111000000004321,
+    5162000000009876
+]
+
+
+def descriptions(
+        bank: str
+) -> list[str]:
+    with open(
+            file=os.path.join(
+                os.path.dirname(os.path.dirname(__file__)),
+                'parsers',
+                'banks',
+                f'{"mp" if bank == "mercado_pago" else "inter"}_category.json'
+            ),
+            mode='r',
+            encoding='utf-8'
+    ) as f:
+        return [
+            item['description'] for item in json.load(f)
+        ]
+
+
+def statements(
+        seed: int = 7
+) -> list[dict]:
+    """
+    Builds the corpus statements, one per bank and runtype.
+    """
+    generator = random.Random(seed)
+    mp: list[str] = descriptions('mercado_pago')
+    inter: list[str] = [
+        re.sub(r'-r\$ ', '-r$', line) for line in descriptions('inter_brasil')
+    ]
+
+    mp_common: list[str] = [
+        'mercado pago instituição de pagamento ltda. cnpj n.º 10.573.521/0001-91.',
+        'extrato de conta',
+        'data descrição id da operação valor saldo'
+    ]
+    for i in range(120):
+        if i % 5 == 0:
+            mp_common += [
+                f'transferência pix {generator.choice(["enviada", "recebida"])}',
+                f'{generator.randint(1, 28):02d}-06-2025 {generator.randrange(10 ** 11, 10 ** 12)} r$ -{generator.randint(1, 999)},00 r$ 100,00',
+                generator.choice(['maria souza', 'joao pereira', 'posto central'])
+            ]
+        mp_common.append(generator.choice(mp))
+    mp_common.append('encontre nossos canais de consulta em:www.mercadopago.com.br')
+
+    ib_common: list[str] = [
+        'solicitado em 01/06/2025',
+        '2 de junho de 2025 saldo do dia: r$ 10,00'
+    ]
+    for i in range(120):
+        if i % 7 == 0:
+            ib_common.append(
+                f'{generator.randint(1, 28)} de {generator.choice(["junho", "jul.", "maio", "set."])} '
+                f'{generator.choice(["de ", ""])}2025 saldo r$ 50,00'
+            )
+        ib_common.append(generator.choice(inter))
+        ib_common.append(
+            f'compra no debito no estabelecimento {generator.choice(["padaria boa", "mercado sol"])}" -r${generator.randint(1, 99)},50 r$ 1,00'
+        )
+
+    ib_bill: list[str] = [
+        'despesas da fatura',
+        'cartão 5502****1234'
+    ]
+    for i in range(60):
+        if i == 30:
+            ib_bill.append('cartão 4111****4321')
+        ib_bill.append(f'{generator.randint(1, 28)} de jun. 2025')
+        ib_bill.append(
+            f'{generator.randint(10, 28)}/06 {generator.choice(["loja teste", "ifood", "uber trip"])} '
+            f'{generator.randrange(10 ** 11, 10 ** 12)} r$ {generator.randint(1, 9)},50'
+        )
+    ib_bill.append('gustavo ribeiro silva')
+
+    # Bill lines carry their own date, amounts go up to four digits before the comma.
+    inter_bill: list[str] = [
+        'resumo da fatura',
+        'despesas da fatura',
+        'cartão 5502****1234'
+    ]
+    for i in range(60):
+        if i == 30:
+            inter_bill.append('cartão 4111****4321')
+        inter_bill.append(
+            f'{generator.randint(1, 28):02d} de {generator.choice(["abr.", "mai.", "jun."])} 2025 '
+            f'{generator.choice(["wellhub gympass br gym", "uber uber *trip help.u", "mercadolivre*quantumn (parcela 01 de 02)"])} '
+            f'- r$ {generator.choice([f"{generator.randint(1, 99)},{generator.randint(0, 99):02d}", f"{generator.randint(100, 999)},90", f"{generator.randint(1, 9)}.{generator.randint(0, 999):03d},00"])}'
+        )
+    inter_bill.append('gustavo ribeiro silva')
+
+    # Mercado Pago bill lines have no year, the parser takes the current one.
+    # Amounts under r$ 100 don't match the "priced" pattern of the spec and are skipped.
+    mp_bill: list[str] = [
+        'essa e sua fatura',
+        'movimentacoes na fatura',
+        'cartão visa [*9876]'
+    ]
+    for i in range(60):
+        if i == 30:
+            mp_bill.append('cartão visa [*1234]')
+        mp_bill.append(
+            f'{generator.randint(1, 28):02d}/06 {generator.choice(["loja teste", "ifood", "uber trip", "posto central"])} '
+            f'{generator.randrange(10 ** 11, 10 ** 12)} r$ '
+            f'{generator.choice([f"{generator.randint(1, 99)},50", f"{generator.randint(100, 999)},00", f"{generator.randint(1, 9)}.{generator.randint(0, 999):03d},75"])}'
+        )
+    mp_bill.append('gustavo ribeiro silva')
+
+    return [
+        {
+            'bank': 'mercado_pago',
+            'runtype': 'mp_common',
+            'pages': ['\n'.join(mp_common[:60]).upper(), '\n'.join(mp_common[60:])]
+        },
+        {
+            'bank': 'inter_brasil',
+            'runtype': 'ib_common',
+            'pages': ['\n'.join(ib_common[:150]), '\n'.join(ib_common[150:])]
+        },
+        {
+            'bank': 'inter_brasil',
+            'runtype': 'ib_bill',
+            'pages': ['\n'.join(ib_bill)]
+        },
+        {
+            'bank': 'inter_brasil',
+            'runtype': 'inter_bill',
+            'pages': ['\n'.join(inter_bill[:31]), '\n'.join(inter_bill[31:])]
+        },
+        {
+            'bank': 'mercado_pago',
+            'runtype': 'mp_bill',
+            'pages': ['\n'.join(mp_bill)]
+        }
+    ]
+
+
+def parse(
+        statement: dict,
+        conn: storage.SQLiteStorage
+) -> list[dict]:
+    bank = registry.index().get(
+        key=statement['bank']
+    ).module()
+    movements: list[dict] = [
+        movement for movement, _ in bank.stream(
+            runtype=statement['runtype'],
+            pages=statement['pages'],
+            conn=conn,
+            modules=bank.Modules()
+        )
+    ]
+    return movements
+
+
+def comparable(
+        statement: dict,
+        movements: list[dict]
+) -> list[dict]:
+    # The year of a Mercado Pago bill date is the current one, it can't be compared.
+    if statement['runtype'] != 'mp_bill':
+        return movements
+    return [
+        dict(movement, date=movement['date'][5:]) for movement in movements
+    ]
+
+
+def run(
+        conn: storage.SQLiteStorage,
+        repeat: int,
+        update: bool
+) -> None:
+    if update:
+        corpus: list[dict] = statements()
+        for statement in corpus:
+            statement['movements'] = parse(
+                statement=statement,
+                conn=conn
+            )
+        with open(
+                file=CORPUS_PATH,
+                mode='w',
+                encoding='utf-8'
+        ) as f:
+            json.dump(
+                obj=corpus,
+                fp=f,
+                ensure_ascii=False
+            )
+        print(f'{len(corpus)} statements written to {CORPUS_PATH}')
+        return
+
+    with open(
+            file=CORPUS_PATH,
+            mode='r',
+            encoding='utf-8'
+    ) as f:
+        corpus = json.load(f)
+
+    print(f'{"statement":>26} {"lines":>7} {"movements":>10} {"lines/s":>11}')
+    for statement in corpus:
+        name: str = f'{statement["bank"]}/{statement["runtype"]}'
+        assert comparable(
+            statement=statement,
+            movements=parse(
+                statement=statement,
+                conn=conn
+            )
+        ) == comparable(
+            statement=statement,
+            movements=statement['movements']
+        ), f'{name} differs from the corpus'
+
+        lines: int = sum(
+            page.count('\n') + 1 for page in statement['pages']
+        )
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parse(
+                statement=statement,
+                conn=conn
+            )
+        seconds = time.perf_counter() - start
+        print(f'{name:>26} {lines:>7} {len(statement["movements"]):>10} {lines * repeat / seconds:>11.0f}')
+
+
+def main(
+
+) -> None:
+    arg_parser = argparse.ArgumentParser(
+        description='Bank parser regression corpus and lines/s.'
+    )
+    arg_parser.add_argument('--repeat', type=int, default=20)
+    arg_parser.add_argument('--update', action='store_true', help='store the current output as expected')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        conn = storage.SQLiteStorage(
+            path=os.path.join(
+                directory,
+                'cards.sqlite3'
+            )
+        )
+        conn.add_cards(
+            card_ids=CARDS
+        )
+        try:
+            run(
+                conn=conn,
+                repeat=args.repeat,
+                update=args.update
+            )
+        finally:
+            conn.close()
+
+if __name__ == '__main__':
+    main()
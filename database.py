@@ -0,0 +1,251 @@
+import time
+import threading
+import contextlib
+
+import mysql.connector
+
+from typing import Iterator
+from mysql.connector.errors import Error, PoolError
+from mysql.connector.abstracts import MySQLConnectionAbstract
+
+
+class PooledConnection:
+    """
+    Connection checked out of a Pool.
+
+    Behaves like the MySQL connection it wraps, but close() checks it back
+    in instead of closing it, so code written for one connection per file
+    (batch.process, batch.load_history) works unchanged on a pool.
+    """
+
+    def __init__(
+            self,
+            pool: 'Pool',
+            cnx: MySQLConnectionAbstract
+    ) -> None:
+        self.pool: Pool = pool
+        self.cnx: MySQLConnectionAbstract = cnx
+        self.closed: bool = False
+
+    def __getattr__(
+            self,
+            name: str
+    ):
+        return getattr(
+            self.cnx,
+            name
+        )
+
+    def __enter__(
+            self
+    ) -> 'PooledConnection':
+        return self
+
+    def __exit__(
+            self,
+            *exc
+    ) -> None:
+        self.close()
+
+    def close(
+            self
+    ) -> None:
+        if not self.closed:
+            self.closed = True
+            self.pool.release(
+                cnx=self.cnx
+            )
+
+
+class Pool:
+    """
+    Bounded pool of MySQL connections shared by the parser and insert paths.
+
+    Connections are opened on demand up to "size" and reused afterwards.
+    A checkout waits up to "checkout_timeout" seconds for a free connection
+    and raises PoolError after that. A connection idle for more than
+    "health_interval" seconds is pinged before it is handed out, and replaced
+    by a new one when the server dropped it (wait_timeout, restarts).
+    """
+
+    def __init__(
+            self,
+            size: int,
+            connect_timeout: int,
+            read_timeout: int,
+            checkout_timeout: float,
+            health_interval: float,
+            **credentials
+    ) -> None:
+        self.size: int = max(size, 1)
+        self.connect_timeout: int = connect_timeout
+        self.read_timeout: int = read_timeout
+        self.checkout_timeout: float = checkout_timeout
+        self.health_interval: float = health_interval
+        self.credentials: dict = credentials
+
+        self.condition = threading.Condition()
+        # (connection, checked in at), the most recently used is reused first.
+        self.idle: list[tuple[MySQLConnectionAbstract, float]] = []
+        self.opened: int = 0
+        self.in_use: int = 0
+        self.peak: int = 0
+        self.checkouts: int = 0
+        self.waits: int = 0
+        self.wait_seconds: float = 0.0
+        self.reconnects: int = 0
+        self.timeouts: int = 0
+
+        # Opens the first connection right away, so bad credentials fail here.
+        self.idle.append(
+            (self.open(), time.monotonic())
+        )
+        self.opened = 1
+
+    def open(
+            self
+    ) -> MySQLConnectionAbstract:
+        return mysql.connector.connect(
+            connection_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            **self.credentials
+        )
+
+    def healthy(
+            self,
+            cnx: MySQLConnectionAbstract,
+            idle_since: float
+    ) -> bool:
+        if time.monotonic() - idle_since < self.health_interval:
+            return True
+        try:
+            cnx.ping(
+                reconnect=False
+            )
+            return True
+        except Error:
+            return False
+
+    def acquire(
+            self
+    ) -> PooledConnection:
+        """
+        Checks a connection out, close() the returned connection to check it back in.
+        """
+        start = time.monotonic()
+        with self.condition:
+            waited: bool = False
+            while not self.idle and self.opened >= self.size:
+                waited = True
+                remaining = self.checkout_timeout - (time.monotonic() - start)
+                if remaining <= 0 or not self.condition.wait(
+                        timeout=remaining
+                ):
+                    if not self.idle and self.opened >= self.size:
+                        self.timeouts += 1
+                        raise PoolError(
+                            f'No connection available after {self.checkout_timeout}s ({self.size} in use).'
+                        )
+            if waited:
+                self.waits += 1
+                self.wait_seconds += time.monotonic() - start
+
+            cnx, idle_since = self.idle.pop() if self.idle else (None, 0.0)
+            if cnx is None:
+                self.opened += 1
+            self.in_use += 1
+            self.peak = max(self.peak, self.in_use)
+            self.checkouts += 1
+
+        # Network calls happen outside the lock, the slot is already taken.
+        try:
+            if cnx is not None and not self.healthy(
+                    cnx=cnx,
+                    idle_since=idle_since
+            ):
+                with contextlib.suppress(Error):
+                    cnx.close()
+                cnx = None
+                with self.condition:
+                    self.reconnects += 1
+            if cnx is None:
+                cnx = self.open()
+        except Exception:
+            with self.condition:
+                self.opened -= 1
+                self.in_use -= 1
+                self.condition.notify()
+            raise
+        return PooledConnection(
+            pool=self,
+            cnx=cnx
+        )
+
+    def release(
+            self,
+            cnx: MySQLConnectionAbstract
+    ) -> None:
+        # A transaction left open by a failed insert must not leak into the next checkout.
+        try:
+            if cnx.in_transaction:
+                cnx.rollback()
+            usable: bool = cnx.is_connected()
+        except Error:
+            usable = False
+
+        with self.condition:
+            self.in_use -= 1
+            # After close() the size is 0 and every connection coming back is closed.
+            usable = usable and self.opened <= self.size
+            if usable:
+                self.idle.append(
+                    (cnx, time.monotonic())
+                )
+            else:
+                self.opened -= 1
+            self.condition.notify()
+        if not usable:
+            with contextlib.suppress(Error):
+                cnx.close()
+
+    @contextlib.contextmanager
+    def connection(
+            self
+    ) -> Iterator[PooledConnection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(
+            self
+    ) -> dict[str, int | float]:
+        with self.condition:
+            return {
+                'size': self.size,
+                'open': self.opened,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'peak': self.peak,
+                'utilization': round(self.peak / self.size, 2) if self.size else 0.0,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'reconnects': self.reconnects,
+                'timeouts': self.timeouts
+            }
+
+    def close(
+            self
+    ) -> None:
+        """
+        Closes the idle connections, checked out ones are closed when checked back in.
+        """
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.opened -= len(idle)
+            self.size = 0
+        for cnx, _ in idle:
+            with contextlib.suppress(Error):
+                cnx.close()
@@ -0,0 +1,401 @@
+import os
+import time
+import tempfile
+import threading
+
+from typing import Iterator
+from mysql.connector.errors import Error
+from mysql.connector.pooling import PooledMySQLConnection
+from mysql.connector.abstracts import MySQLConnectionAbstract
+
+from parsers import fingerprint
+
+COLUMNS: tuple[str, ...] = (
+    'transaction_id',
+    'date',
+    'description',
+    'value',
+    'counterparty',
+    'method',
+    'banks_id',
+    'banks_name',
+    'cards_id',
+    'category_name',
+    'fingerprint'
+)
+# Re-imported rows keep their fingerprint and get the fields a later parse or correction can change.
+UPDATED: tuple[str, ...] = (
+    'transaction_id',
+    'description',
+    'method',
+    'cards_id',
+    'category_name'
+)
+MODES: tuple[str, ...] = ('values', 'infile')
+
+_lock = threading.Lock()
+_checked: set[str] = set()
+
+
+def migrated(
+        conn: MySQLConnectionAbstract | PooledMySQLConnection,
+        table: str
+) -> bool:
+    with conn.cursor() as cursor:
+        # SHOW COLUMNS also sees temporary tables, information_schema doesn't.
+        cursor.execute(
+            f"SHOW COLUMNS FROM {table} LIKE 'fingerprint'"
+        )
+        return bool(cursor.fetchall())
+
+
+def migrate(
+        conn: MySQLConnectionAbstract | PooledMySQLConnection,
+        table: str = 'movements'
+) -> bool:
+    """
+    Adds the unique fingerprint column to the table, run it with "python main.py migrate".
+
+    It is an explicit step because the ALTER rebuilds the table: run it once
+    per database, before the first insert. Rows stored before the column
+    existed keep a NULL fingerprint, which the unique key ignores.
+
+    Parameters:
+        conn (MySQLConnectionAbstract | PooledMySQLConnection): Database connection object
+        table (str): Table to migrate
+
+    Returns:
+        bool: True if the column was added, False if it was already there
+    """
+    if migrated(
+            conn=conn,
+            table=table
+    ):
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f'ALTER TABLE {table} ADD COLUMN fingerprint CHAR(40) NULL, '
+            f'ADD UNIQUE KEY {table}_fingerprint (fingerprint)'
+        )
+    return True
+
+
+def require(
+        conn: MySQLConnectionAbstract | PooledMySQLConnection,
+        table: str
+) -> None:
+    # Checked once per process, insert() never changes the schema itself.
+    with _lock:
+        if table in _checked:
+            return
+        if not migrated(
+                conn=conn,
+                table=table
+        ):
+            raise RuntimeError(f'Table "{table}" has no fingerprint column, run "python main.py migrate" first.')
+        _checked.add(table)
+
+
+def repeatable(
+        conn: MySQLConnectionAbstract | PooledMySQLConnection
+) -> None:
+    # The "infile" re-check of insert() relies on the transaction snapshot,
+    # READ COMMITTED would count rows of a concurrent import as our own.
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT @@transaction_isolation')
+        (level,), = cursor.fetchall()
+    if level != 'REPEATABLE-READ':
+        raise RuntimeError(f'The "infile" mode needs the REPEATABLE-READ isolation level, the session uses {level}.')
+
+
+def known(
+        cursor,
+        chunk: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ],
+        table: str
+) -> set[str]:
+    # One query per chunk tells which fingerprints are already stored.
+    cursor.execute(
+        f'SELECT fingerprint FROM {table} WHERE fingerprint IN ({", ".join(["%s"] * len(chunk))})',
+        [movement['fingerprint'] for movement in chunk]
+    )
+    return {
+        stored for (stored,) in cursor.fetchall()
+    }
+
+
+def chunks(
+        movements: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ],
+        chunk_size: int
+) -> Iterator[
+    list[
+        dict[
+            str,
+            str | int | float | None
+        ]
+    ]
+]:
+    chunk_size = max(chunk_size, 1)
+    for start in range(0, len(movements), chunk_size):
+        yield movements[start:start + chunk_size]
+
+
+def row(
+        movement: dict[
+            str,
+            str | int | float | None
+        ]
+) -> tuple:
+    return tuple(
+        movement[column] for column in COLUMNS
+    )
+
+
+def insert_values(
+        cursor,
+        chunk: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ],
+        table: str
+) -> int:
+    # One INSERT with a VALUES group per movement, a single round-trip per chunk.
+    # Upserts on the fingerprint, for rows stored since known() ran.
+    placeholders: str = '(' + ', '.join(['%s'] * len(COLUMNS)) + ')'
+    cursor.execute(
+        f'INSERT INTO {table} ({", ".join(COLUMNS)}) VALUES ' + ', '.join([placeholders] * len(chunk)) +
+        ' ON DUPLICATE KEY UPDATE ' + ', '.join(f'{column} = VALUES({column})' for column in UPDATED),
+        [value for movement in chunk for value in row(movement=movement)]
+    )
+    return cursor.rowcount
+
+
+def escape(
+        value: str | int | float | None
+) -> str:
+    # LOAD DATA default format: tab separated, \N for NULL, backslash escapes.
+    if value is None:
+        return '\\N'
+    return str(value).replace(
+        '\\', '\\\\'
+    ).replace(
+        '\t', '\\t'
+    ).replace(
+        '\n', '\\n'
+    )
+
+
+def insert_infile(
+        cursor,
+        chunk: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ],
+        table: str
+) -> int:
+    # Needs allow_local_infile on the connection and local_infile on the server.
+    with tempfile.NamedTemporaryFile(
+            mode='w',
+            suffix='.tsv',
+            encoding='utf-8',
+            delete=False
+    ) as f:
+        for movement in chunk:
+            f.write('\t'.join(escape(value) for value in row(movement=movement)) + '\n')
+    try:
+        cursor.execute(
+            # LOAD DATA has no upsert, IGNORE skips rows whose fingerprint is already stored.
+            f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {table} CHARACTER SET utf8mb4 ({', '.join(COLUMNS)})",
+            (f.name,)
+        )
+        return cursor.rowcount
+    finally:
+        os.remove(f.name)
+
+
+def salvage(
+        conn: MySQLConnectionAbstract | PooledMySQLConnection,
+        chunk: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ],
+        table: str
+) -> tuple[
+    list[
+        dict[
+            str,
+            str | int | float | None
+        ]
+    ],
+    list[
+        tuple[
+            dict[
+                str,
+                str | int | float | None
+            ],
+            str
+        ]
+    ]
+]:
+    """
+    Inserts the rows of a failed chunk one at a time, so only the offending rows are left out.
+
+    Returns:
+        tuple: The inserted movements, and the offending movements with their error
+    """
+    inserted: list = []
+    offending: list = []
+    with conn.cursor() as cursor:
+        for movement in chunk:
+            try:
+                insert_values(
+                    cursor=cursor,
+                    chunk=[movement],
+                    table=table
+                )
+                conn.commit()
+                inserted.append(movement)
+            except Error as e:
+                conn.rollback()
+                offending.append(
+                    (movement, str(e))
+                )
+    return inserted, offending
+
+
+def insert(
+        movements: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ],
+        conn: MySQLConnectionAbstract | PooledMySQLConnection,
+        chunk_size: int = 500,
+        mode: str = 'values',
+        table: str = 'movements'
+) -> dict:
+    """
+    Inserts movements in chunks, committing after each one.
+
+    Parameters:
+        movements (list[dict[str, str | int | float | None]]): Parsed movements
+        conn (MySQLConnectionAbstract | PooledMySQLConnection): Database connection object
+        chunk_size (int): Movements per INSERT statement and transaction
+        mode (str): "values" sends a multi-row INSERT per chunk, "infile" streams
+            each chunk through LOAD DATA LOCAL INFILE, for very large imports
+        table (str): Target table, the benchmark uses a temporary copy of movements
+
+    Returns:
+        dict: "rows" and "chunks" sent, "inserted" movements (in order), the
+            "skipped" movements already stored, the "failed" chunks as
+            {"chunk", "error", "rows": [(movement, error), ...]} and the "seconds" spent
+
+    A chunk that fails is rolled back and its rows are retried one by one,
+    so a bad row only costs its own insert and the rest of the backfill
+    still goes in. Movements whose fingerprint (see parsers.fingerprint) is
+    already in the table are skipped, so a statement can be imported again.
+    The table needs the fingerprint column, see migrate().
+    With "infile", rows LOAD DATA ignored as duplicates are reported as
+    skipped, never as inserted, which needs the session at the default
+    REPEATABLE READ isolation level.
+    """
+    if mode not in MODES:
+        raise ValueError(f'Unknown insert mode "{mode}", expected one of {MODES}.')
+    if any('fingerprint' not in movement for movement in movements):
+        fingerprint.stamp(
+            movements=movements
+        )
+    require(
+        conn=conn,
+        table=table
+    )
+    if mode == 'infile':
+        repeatable(
+            conn=conn
+        )
+
+    report: dict = {
+        'rows': len(movements),
+        'chunks': 0,
+        'inserted': [],
+        'skipped': [],
+        'failed': [],
+        'seconds': 0.0
+    }
+    start = time.perf_counter()
+    for index, chunk in enumerate(chunks(
+            movements=movements,
+            chunk_size=chunk_size
+    )):
+        report['chunks'] += 1
+        try:
+            with conn.cursor() as cursor:
+                stored: set[str] = known(
+                    cursor=cursor,
+                    chunk=chunk,
+                    table=table
+                )
+                report['skipped'].extend(
+                    movement for movement in chunk if movement['fingerprint'] in stored
+                )
+                chunk = [
+                    movement for movement in chunk if movement['fingerprint'] not in stored
+                ]
+                if not chunk:
+                    # Ends the transaction known() opened, the next chunk gets a fresh snapshot.
+                    conn.commit()
+                    continue
+                written: int = (insert_infile if mode == 'infile' else insert_values)(
+                    cursor=cursor,
+                    chunk=chunk,
+                    table=table
+                )
+                if mode == 'infile' and written < len(chunk):
+                    # IGNORE left out rows another import stored since known() ran. Under
+                    # REPEATABLE READ (see repeatable()) this transaction reads the snapshot
+                    # taken by known(), so the re-query sees the rows of this chunk and not
+                    # those of the other import.
+                    stored = known(
+                        cursor=cursor,
+                        chunk=chunk,
+                        table=table
+                    )
+                    report['skipped'].extend(
+                        movement for movement in chunk if movement['fingerprint'] not in stored
+                    )
+                    chunk = [
+                        movement for movement in chunk if movement['fingerprint'] in stored
+                    ]
+            conn.commit()
+            report['inserted'].extend(chunk)
+        except Error as e:
+            conn.rollback()
+            inserted, offending = salvage(
+                conn=conn,
+                chunk=chunk,
+                table=table
+            )
+            report['inserted'].extend(inserted)
+            report['failed'].append({
+                'chunk': index,
+                'error': str(e),
+                'rows': offending
+            })
+    report['seconds'] = time.perf_counter() - start
+    return report
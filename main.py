@@ -1,205 +1,523 @@
-import os
-import json
-
-import nltk
-import utils
-import dotenv
-import pathlib
-import pdf2image
-import pytesseract
-
-from tkinter import Image
-from getpass import getpass
-from utils import message, clear
-from mysql.connector.pooling import PooledMySQLConnection
-from mysql.connector.abstracts import MySQLConnectionAbstract
-
-dotenv.load_dotenv()
-nltk.download('stopwords')
-
-base_path = os.path.dirname(
-    __file__
-)
-config_path = os.path.join(
-    base_path,
-    'config.json'
-)
-with open(
-    file=config_path,
-    mode='r'
-) as f:
-    appInfo = json.load(f)
-
-
-def main(
-        conn: MySQLConnectionAbstract | PooledMySQLConnection | None
-) -> None:
-
-    running: bool = True
-    while running:
-        try:
-            run_parameter: str | list[str] = []
-
-            pdf_dir: str = './pdf'
-
-            selection: str | None = utils.select_files(
-                pdf_dir=utils.get_files(
-                    pdf_dir=pdf_dir
-                )
-            )
-
-            if selection:
-                clear()
-                if selection != 'manual':
-                    message(
-                        code=-1,
-                        module='parser',
-                        args='Please Wait, This action can take a while...'
-                    )
-                    image: list[Image] = pdf2image.convert_from_path(
-                        dpi=600,
-                        pdf_path=pathlib.Path(pdf_dir) / selection
-                    )
-                    for img in image:
-                        text:  bytes | str | dict[str, bytes | str] = pytesseract.image_to_string(
-                            image=img,
-                            lang='por',
-                            config=r'--oem 3 --psm 4'
-                        )
-                        run_parameter.append(text)
-                else:
-                    run_parameter = selection
-                if len(run_parameter) > 0:
-                    movements = utils.parser(
-                        conn=conn,
-                        app_info=appInfo,
-                        args=run_parameter
-                    )
-                    if movements[0] and conn:
-                        for index, movement in enumerate(movements, 1):
-                            print(f'{index}: {movement}')
-                        message(
-                            module='parser',
-                            code=-1,
-                            args=f'!!!Warning!!! The app is in the {appInfo["version"]} version, check if everything is ok before confirm.'
-                        )
-                        message(
-                            module='parser',
-                            code=-1,
-                            args=f'"{len(movements)}" movements found in the PDF. Do you want to add them to the Database?'
-                        )
-                        confirm: str = input('"Y" to Yes or "N" to No: ').strip().lower()
-                        if confirm == 'y' or confirm == 'yes':
-                            utils.insert_db(
-                                args=movements,
-                                conn=conn
-                            )
-            elif selection is None:
-                running = False
-        except Exception as e:
-            message(
-                module='pdf',
-                code=0,
-                args=e
-            )
-            running = False
-
-
-def debug_mode(
-
-) -> None:
-    clear()
-    try:
-        if getpass('Debug Mode Password: ') == os.getenv('DEBUGMODE_PASSWORD'):
-            message(
-                module='mysql',
-                code=-1,
-                args='-------!!! DEBUG MODE !!!-------' + '\n' +
-                     '- DATABASE CONNECTION DISABLED -' + '\n' +
-                     '--------------------------------' + '\n' * 2
-            )
-            main(
-                conn=None
-            )
-        else:
-            return None
-    except Exception as e:
-        message(
-            module='system',
-            code=0,
-            args=e
-        )
-
-def normal_mode(
-
-) -> None:
-    clear()
-    try:
-        message(
-            module='mysql',
-            code=-1,
-            args='Connecting to database...'
-        )
-        db = utils.connect_database(
-            mysql_host=os.getenv('MYSQL_HOST'),
-            mysql_user=os.getenv('MYSQL_USER'),
-            mysql_port=int(os.getenv('MYSQL_PORT')),
-            mysql_password=os.getenv('MYSQL_PASSWORD'),
-            mysql_database=os.getenv('MYSQL_DATABASE'),
-        )
-    except Exception as e:
-        message(
-            module='mysql',
-            code=1001,
-            args=e
-        )
-    else:
-        message(
-            module='mysql',
-            code=-1,
-            args='Connection successful.'
-        )
-        main(
-            conn=db
-        )
-
-
-clear()
-print(
-    f'Welcome to: {appInfo["name"].upper()}' + '\n' +
-    f'Version: {appInfo["version"]}'
-)
-
-choiceScreen: bool = True
-while choiceScreen:
-    modeNumbers: list[str] = []
-
-    for number in appInfo['modes']:
-        modeNumbers.append(number)
-        print(
-            f'|-- {number}: {appInfo["modes"][number]["name"]}'
-        )
-    modeSelected = input(
-        '\n' + 'Please enter the required mode or "exit" to finalize the program: '
-    ).strip().lower()
-
-    if modeSelected == 'exit' or modeSelected == 'e':
-        clear()
-        message(
-            module='system',
-            code=-1,
-            args='Bye <3.'
-        )
-        choiceScreen = False
-    elif modeSelected not in modeNumbers:
-        clear()
-        message(
-            module='system',
-            code=1004,
-            args=f'Mode "{modeSelected}" not found.'
-        )
-    else:
-        if eval(appInfo['modes'][modeSelected]['alias'])() is None:
-            choiceScreen = True
-        else:
-            choiceScreen = False
\ No newline at end of file
+import os
+import sys
+import json
+import argparse
+import functools
+
+import ocr
+import nltk
+import batch
+import utils
+import storage
+import dotenv
+import watcher
+import pipeline
+import pathlib
+
+from getpass import getpass
+from utils import message, clear
+from parsers import model, rules, history, registry
+
+dotenv.load_dotenv()
+nltk.download('stopwords')
+
+base_path = os.path.dirname(
+    __file__
+)
+config_path = os.path.join(
+    base_path,
+    'config.json'
+)
+with open(
+    file=config_path,
+    mode='r'
+) as f:
+    appInfo = json.load(f)
+
+model.configure(
+    settings=appInfo['categories']
+)
+rules.configure(
+    rules=appInfo['rules']
+)
+registry.configure(
+    parsers=appInfo['parsers']
+)
+ocrCache = ocr.Cache(
+    path=os.path.join(
+        base_path,
+        appInfo['ocr']['cache']['path']
+    ),
+    max_bytes=appInfo['ocr']['cache']['max_mb'] * 1024 * 1024
+)
+
+
+def main(
+        store: storage.Storage | None
+) -> None:
+
+    if store:
+        message(
+            module=store.name,
+            code=-1,
+            args=f'{history.index().load(storage=store)} known counterparties loaded.'
+        )
+
+    running: bool = True
+    while running:
+        try:
+            pdf_dir: str = './pdf'
+
+            selection: str | None = utils.select_files(
+                pdf_dir=utils.get_files(
+                    pdf_dir=pdf_dir
+                )
+            )
+
+            if selection:
+                clear()
+                if selection != 'manual':
+                    message(
+                        code=-1,
+                        module='parser',
+                        args='Please Wait, This action can take a while...'
+                    )
+                    ocr_report: dict[str, int] = {}
+                    movement_lines: list[str] = []
+                    stages: dict[str, dict[str, int]] = {}
+                    movements = pipeline.run(
+                        pages=ocr.pages(
+                            pdf_path=str(pathlib.Path(pdf_dir) / selection),
+                            settings=appInfo['ocr'],
+                            cache=ocrCache,
+                            profile=functools.partial(
+                                utils.ocr_profile,
+                                appInfo
+                            ),
+                            report=ocr_report
+                        ),
+                        app_info=appInfo,
+                        conn=store,
+                        depth=appInfo['pipeline']['depth'],
+                        batch_size=appInfo['pipeline']['batch_size'],
+                        lines=movement_lines,
+                        stages=stages
+                    )
+                    message(
+                        code=-1,
+                        module='ocr',
+                        args=f'Pages: {ocr_report}, Cache stats: {ocrCache.stats()}'
+                    )
+                    message(
+                        code=-1,
+                        module='parser',
+                        args=f'Category cache stats: {model.predictions().stats()}, History stats: {history.index().stats()}'
+                    )
+                    message(
+                        code=-1,
+                        module='parser',
+                        args=f'Stages: {stages}'
+                    )
+                else:
+                    movement_lines = []
+                    movements = utils.parser(
+                        conn=store,
+                        app_info=appInfo,
+                        args=selection
+                    )
+                if movements and store:
+                    for index, movement in enumerate(movements, 1):
+                        print(f'{index}: {movement}')
+                    message(
+                        module='parser',
+                        code=-1,
+                        args=f'!!!Warning!!! The app is in the {appInfo["version"]} version, check if everything is ok before confirm.'
+                    )
+                    message(
+                        module='parser',
+                        code=-1,
+                        args=f'"{len(movements)}" movements found in the PDF. Do you want to add them to the Database?'
+                    )
+                    utils.correct_categories(
+                        movements=movements
+                    )
+                    confirm: str = input('"Y" to Yes or "N" to No: ').strip().lower()
+                    if confirm == 'y' or confirm == 'yes':
+                        report = utils.insert_db(
+                            args=movements,
+                            conn=store,
+                            chunk_size=appInfo['insert']['chunk_size'],
+                            mode=appInfo['insert']['mode']
+                        )
+                        message(
+                            module=store.name,
+                            code=-1,
+                            args=f'Storage stats: {store.stats()}'
+                        )
+                        # Only rows that really went in are learned, the online model is opt-in.
+                        if report and movement_lines and appInfo['categories']['model'] == 'online':
+                            line_of: dict[int, str] = {
+                                id(movement): line for movement, line in zip(movements, movement_lines)
+                            }
+                            ignored: list[str] = model.learn(
+                                lines=[line_of[id(movement)] for movement in report['inserted']],
+                                categories=[movement['category_name'] for movement in report['inserted']]
+                            )
+                            if ignored:
+                                message(
+                                    module='parser',
+                                    code=-1,
+                                    args=f'Not learned, unknown categories: {", ".join(ignored)}. '
+                                         f'Add them to "categories.classes" in config.json and delete the online checkpoint to retrain.'
+                                )
+            elif selection is None:
+                running = False
+        except Exception as e:
+            message(
+                module='pdf',
+                code=0,
+                args=e
+            )
+            running = False
+
+
+def debug_mode(
+
+) -> None:
+    clear()
+    try:
+        if getpass('Debug Mode Password: ') == os.getenv('DEBUGMODE_PASSWORD'):
+            message(
+                module='sqlite',
+                code=-1,
+                args='-------!!! DEBUG MODE !!!-------' + '\n' +
+                     '--- LOCAL SQLITE DATABASE ---' + '\n' +
+                     f'{appInfo["storage"]["sqlite_path"]}' + '\n' +
+                     '--------------------------------' + '\n' * 2
+            )
+            store = open_storage(
+                backend='sqlite'
+            )
+            try:
+                main(
+                    store=store
+                )
+            finally:
+                close_storage(
+                    store=store
+                )
+        else:
+            return None
+    except Exception as e:
+        message(
+            module='system',
+            code=0,
+            args=e
+        )
+
+def normal_mode(
+
+) -> None:
+    clear()
+    backend: str = appInfo['storage']['backend']
+    try:
+        message(
+            module=backend,
+            code=-1,
+            args='Connecting to database...'
+        )
+        store = open_storage(
+            backend=backend
+        )
+    except Exception as e:
+        message(
+            module=backend,
+            code=1001,
+            args=e
+        )
+    else:
+        message(
+            module=store.name,
+            code=-1,
+            args='Connection successful.'
+        )
+        try:
+            main(
+                store=store
+            )
+        finally:
+            close_storage(
+                store=store
+            )
+
+
+def open_storage(
+        backend: str,
+        pool_size: int | None = None
+) -> storage.Storage:
+    return storage.create(
+        backend=backend,
+        path=os.path.join(
+            base_path,
+            appInfo['storage']['sqlite_path']
+        ),
+        connect=functools.partial(
+            utils.connect_database,
+            mysql_host=os.getenv('MYSQL_HOST'),
+            mysql_user=os.getenv('MYSQL_USER'),
+            mysql_port=int(os.getenv('MYSQL_PORT') or 3306),
+            mysql_password=os.getenv('MYSQL_PASSWORD'),
+            mysql_database=os.getenv('MYSQL_DATABASE'),
+            **{
+                **appInfo['database'],
+                'pool_size': pool_size or appInfo['database']['pool_size']
+            }
+        )
+    )
+
+
+def close_storage(
+        store: storage.Storage | None
+) -> None:
+    if store:
+        message(
+            module=store.name,
+            code=-1,
+            args=f'Storage stats: {store.stats()}'
+        )
+        store.close()
+
+
+def batch_mode(
+        argv: list[str]
+) -> None:
+    """
+    Headless ingestion of a directory or glob of PDFs, e.g.:
+        python main.py batch ./pdf --workers 4 --confirm
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog='main.py batch',
+        description='Extract every statement of a directory or glob without prompts.'
+    )
+    arg_parser.add_argument(
+        'source',
+        help='directory or glob pattern of the PDF files'
+    )
+    arg_parser.add_argument(
+        '--workers',
+        type=int,
+        default=appInfo['batch']['workers'],
+        help='files processed at the same time'
+    )
+    arg_parser.add_argument(
+        '--confirm',
+        action='store_true',
+        help='insert the movements in the database instead of staging them'
+    )
+    arg_parser.add_argument(
+        '--stage-dir',
+        default=os.path.join(
+            base_path,
+            appInfo['batch']['stage_dir']
+        ),
+        help='directory the staged JSON files are written to'
+    )
+    arg_parser.add_argument(
+        '--no-db',
+        action='store_true',
+        help='run without database, movements are always staged'
+    )
+    arg_parser.add_argument(
+        '--backend',
+        choices=('mysql', 'sqlite'),
+        default=appInfo['storage']['backend'],
+        help='storage backend, sqlite uses the local file of config.json'
+    )
+    args = arg_parser.parse_args(argv)
+
+    # MySQL grows its pool to one connection per worker.
+    store = None if args.no_db else open_storage(
+        backend=args.backend,
+        pool_size=max(args.workers, appInfo['database']['pool_size'])
+    )
+    try:
+        batch.run(
+            source=args.source,
+            app_info=appInfo,
+            storage=store,
+            cache=ocrCache,
+            workers=args.workers,
+            confirm=args.confirm,
+            stage_dir=args.stage_dir
+        )
+    finally:
+        close_storage(
+            store=store
+        )
+
+
+def watch_mode(
+        argv: list[str]
+) -> None:
+    """
+    Daemon that ingests every PDF dropped in the watched directory, e.g.:
+        python main.py watch ./pdf --confirm
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog='main.py watch',
+        description='Watch a directory and extract every new or changed statement.'
+    )
+    arg_parser.add_argument(
+        'pdf_dir',
+        nargs='?',
+        default=os.path.join(
+            base_path,
+            appInfo['watch']['dir']
+        ),
+        help='directory to watch'
+    )
+    arg_parser.add_argument(
+        '--workers',
+        type=int,
+        default=appInfo['batch']['workers'],
+        help='files processed at the same time'
+    )
+    arg_parser.add_argument(
+        '--interval',
+        type=float,
+        default=appInfo['watch']['interval'],
+        help='seconds between two scans of the directory'
+    )
+    arg_parser.add_argument(
+        '--confirm',
+        action='store_true',
+        help='insert the movements in the database instead of staging them'
+    )
+    arg_parser.add_argument(
+        '--stage-dir',
+        default=os.path.join(
+            base_path,
+            appInfo['batch']['stage_dir']
+        ),
+        help='directory the staged JSON files are written to'
+    )
+    arg_parser.add_argument(
+        '--no-db',
+        action='store_true',
+        help='run without database, movements are always staged'
+    )
+    arg_parser.add_argument(
+        '--backend',
+        choices=('mysql', 'sqlite'),
+        default=appInfo['storage']['backend'],
+        help='storage backend, sqlite uses the local file of config.json'
+    )
+    args = arg_parser.parse_args(argv)
+
+    # MySQL grows its pool to one connection per worker.
+    store = None if args.no_db else open_storage(
+        backend=args.backend,
+        pool_size=max(args.workers, appInfo['database']['pool_size'])
+    )
+    try:
+        watcher.watch(
+            pdf_dir=args.pdf_dir,
+            app_info=appInfo,
+            storage=store,
+            cache=ocrCache,
+            workers=args.workers,
+            confirm=args.confirm,
+            stage_dir=args.stage_dir,
+            ledger_path=os.path.join(
+                base_path,
+                appInfo['watch']['ledger']
+            ),
+            interval=args.interval,
+            queue_size=appInfo['watch']['queue_size']
+        )
+    finally:
+        close_storage(
+            store=store
+        )
+
+
+def migrate_mode(
+        argv: list[str]
+) -> None:
+    """
+    One-off schema migration of the MySQL movements table, run before the first insert:
+        python main.py migrate
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog='main.py migrate',
+        description='Add the unique fingerprint column to the MySQL movements table.'
+    )
+    arg_parser.parse_args(argv)
+
+    store = open_storage(
+        backend='mysql'
+    )
+    try:
+        message(
+            module=store.name,
+            code=-1,
+            args='Fingerprint column added to movements.' if store.migrate() else 'movements already has the fingerprint column.'
+        )
+    finally:
+        close_storage(
+            store=store
+        )
+
+
+if __name__ == '__main__' and sys.argv[1:2] == ['batch']:
+    batch_mode(
+        argv=sys.argv[2:]
+    )
+elif __name__ == '__main__' and sys.argv[1:2] == ['watch']:
+    watch_mode(
+        argv=sys.argv[2:]
+    )
+elif __name__ == '__main__' and sys.argv[1:2] == ['migrate']:
+    migrate_mode(
+        argv=sys.argv[2:]
+    )
+elif __name__ == '__main__':
+    clear()
+    print(
+        f'Welcome to: {appInfo["name"].upper()}' + '\n' +
+        f'Version: {appInfo["version"]}'
+    )
+
+    choiceScreen: bool = True
+    while choiceScreen:
+        modeNumbers: list[str] = []
+
+        for number in appInfo['modes']:
+            modeNumbers.append(number)
+            print(
+                f'|-- {number}: {appInfo["modes"][number]["name"]}'
+            )
+        modeSelected = input(
+            '\n' + 'Please enter the required mode or "exit" to finalize the program: '
+        ).strip().lower()
+
+        if modeSelected == 'exit' or modeSelected == 'e':
+            clear()
+            message(
+                module='system',
+                code=-1,
+                args='Bye <3.'
+            )
+            choiceScreen = False
+        elif modeSelected not in modeNumbers:
+            clear()
+            message(
+                module='system',
+                code=1004,
+                args=f'Mode "{modeSelected}" not found.'
+            )
+        else:
+            if eval(appInfo['modes'][modeSelected]['alias'])() is None:
+                choiceScreen = True
+            else:
+                choiceScreen = False
\ No newline at end of file
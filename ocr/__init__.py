@@ -0,0 +1,4 @@
+from .cache import Cache
+from .document import pages, extract
+from .raster import stream, page_count
+from .pool import run, iterate, workers_count
@@ -0,0 +1,89 @@
+import pdf2image
+
+from typing import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+from .pool import workers_count, get_engine, _init_worker
+
+
+def _ocr_page(
+        pdf_path: str,
+        page: int,
+        ladder: list[int],
+        threshold: float,
+        backend: str,
+        lang: str,
+        config: str
+) -> tuple[str, int]:
+    ocr_engine = get_engine(
+        backend=backend,
+        lang=lang,
+        config=config
+    )
+
+    text: str = ''
+    for rung, dpi in enumerate(ladder):
+        image = pdf2image.convert_from_path(
+            dpi=dpi,
+            pdf_path=pdf_path,
+            first_page=page,
+            last_page=page
+        )[0]
+        text, confidence = ocr_engine.recognize(
+            image=image
+        )
+        if confidence >= threshold:
+            return text, rung
+    return text, len(ladder) - 1
+
+
+def iterate(
+        pdf_path: str,
+        pages: list[int],
+        workers: int | None,
+        profile: dict,
+        lang: str,
+        config: str,
+        backend: str = 'auto'
+) -> Iterator[tuple[str, int]]:
+    """
+    OCRs pages at the lowest DPI of a ladder and re-renders only the ones tesseract is unsure about.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file
+        pages (list[int]): 1-based page numbers to OCR
+        workers (int | None): Number of worker processes, 0 or None for one per CPU core
+        profile (dict): "ladder" (ascending DPIs) and "threshold" (minimum mean word confidence)
+        lang (str): Tesseract language
+        config (str): Tesseract config string
+        backend (str): OCR engine, see ocr.engine.create
+
+    Returns:
+        Iterator[tuple[str, int]]: The text of every page in order, with the index of
+            the ladder rung it was accepted at (0 means it was not escalated)
+
+    Workers render their own page, so only one image per worker is ever in memory.
+    """
+    arguments = [
+        (pdf_path, page, profile['ladder'], profile['threshold'], backend, lang, config) for page in pages
+    ]
+    workers = min(
+        workers_count(
+            workers=workers
+        ),
+        len(pages)
+    )
+
+    if workers <= 1:
+        for argument in arguments:
+            yield _ocr_page(*argument)
+        return
+
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker
+    ) as executor:
+        yield from executor.map(
+            _ocr_page,
+            *zip(*arguments)
+        )
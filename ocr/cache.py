@@ -0,0 +1,270 @@
+import os
+import json
+import hashlib
+import threading
+
+from typing import Callable
+
+
+class Cache:
+    """
+    Persistent, content-addressed store for OCR output.
+
+    Every page is saved under a key derived from the PDF content hash, the
+    page number and the OCR settings, including the adaptive profile of the
+    bank, so renaming a file keeps its entries and changing the DPI,
+    language, tesseract config or DPI ladder never returns stale text.
+    When the directory grows past `max_bytes` the least recently used
+    entries are removed.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            max_bytes: int
+    ) -> None:
+        self.path: str = path
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        # Batch and watch workers share the cache, one eviction or counter update at a time.
+        self.lock = threading.Lock()
+
+        os.makedirs(
+            name=self.path,
+            exist_ok=True
+        )
+
+    @staticmethod
+    def fingerprint(
+            pdf_path: str
+    ) -> str:
+        """
+        Hashes the content of a PDF.
+
+        Parameters:
+            pdf_path (str): Path to the PDF file
+
+        Returns:
+            str: Hex SHA-256 digest of the file
+        """
+        digest = hashlib.sha256()
+        with open(
+                file=pdf_path,
+                mode='rb'
+        ) as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(
+            pdf_hash: str,
+            page: int | None,
+            settings: dict,
+            ocr_profile: dict | None = None
+    ) -> str:
+        """
+        Builds the cache key of a page, or of the whole document when page is None.
+
+        Parameters:
+            pdf_hash (str): Content hash returned by fingerprint()
+            page (int | None): 1-based page number
+            settings (dict): The "ocr" section of config.json
+            ocr_profile (dict | None): Adaptive settings resolved for the bank (DPI ladder
+                and threshold), defaults to ocr.adaptive
+
+        Returns:
+            str: Hex digest used as the entry file name
+        """
+        if ocr_profile is None:
+            ocr_profile = settings['adaptive']
+        return hashlib.sha256(
+            json.dumps(
+                obj=[
+                    pdf_hash,
+                    page,
+                    settings['dpi'],
+                    settings['lang'],
+                    settings['config'],
+                    ocr_profile if settings['adaptive']['enabled'] else None
+                ]
+            ).encode('utf-8')
+        ).hexdigest()
+
+    def _entry(
+            self,
+            key: str
+    ) -> str:
+        return os.path.join(
+            self.path,
+            key
+        )
+
+    def get(
+            self,
+            key: str
+    ) -> str | None:
+        entry = self._entry(
+            key=key
+        )
+        try:
+            with open(
+                    file=entry,
+                    mode='r',
+                    encoding='utf-8'
+            ) as f:
+                text = f.read()
+            os.utime(entry)
+        except FileNotFoundError:
+            # Also when another thread evicted the entry right after the read.
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return text
+
+    def put(
+            self,
+            key: str,
+            text: str
+    ) -> None:
+        entry = self._entry(
+            key=key
+        )
+        # One temporary file per thread, two workers may store the same page.
+        tmp: str = f'{entry}.{threading.get_ident()}.tmp'
+        with open(
+                file=tmp,
+                mode='w',
+                encoding='utf-8'
+        ) as f:
+            f.write(text)
+        os.replace(
+            tmp,
+            entry
+        )
+
+    def evict(
+            self
+    ) -> None:
+        with self.lock:
+            stats: dict[str, os.stat_result] = {}
+            for entry in os.scandir(
+                    self.path
+            ):
+                try:
+                    if entry.is_file() and not entry.name.endswith('.tmp'):
+                        stats[entry.path] = entry.stat()
+                except FileNotFoundError:
+                    continue
+            size: int = sum(
+                stat.st_size for stat in stats.values()
+            )
+
+            for path in sorted(stats, key=lambda p: stats[p].st_mtime):
+                if size <= self.max_bytes:
+                    break
+                size -= stats[path].st_size
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def get_document(
+            self,
+            pdf_hash: str,
+            settings: dict,
+            profile: Callable[[str], dict] | None = None
+    ) -> list[str] | None:
+        """
+        Returns every page of a document if all of them are cached.
+
+        The document entry only stores the page count and the adaptive
+        profile the pages were read with, so a full hit never needs to open
+        the PDF. When the bank profile resolved from the first page (see
+        document.pages) is not the stored one, the pages are stale and
+        nothing is returned.
+        """
+        manifest = self.get(
+            key=self.key(
+                pdf_hash=pdf_hash,
+                page=None,
+                settings=settings
+            )
+        )
+        if manifest is None:
+            return None
+        manifest = json.loads(manifest)
+        if isinstance(manifest, int):
+            # Written before the profile was stored.
+            manifest = {
+                'pages': manifest,
+                'profile': None
+            }
+
+        texts: list[str] = []
+        for page in range(1, manifest['pages'] + 1):
+            text = self.get(
+                key=self.key(
+                    pdf_hash=pdf_hash,
+                    page=page,
+                    settings=settings,
+                    ocr_profile=manifest['profile']
+                )
+            )
+            if text is None:
+                return None
+            texts.append(text)
+
+        if settings['adaptive']['enabled'] and texts:
+            resolved: dict = profile(texts[0]) if profile else settings['adaptive']
+            if resolved != (manifest['profile'] or settings['adaptive']):
+                return None
+        return texts
+
+    def put_document(
+            self,
+            pdf_hash: str,
+            settings: dict,
+            texts: list[str],
+            ocr_profile: dict | None = None
+    ) -> None:
+        for page, text in enumerate(texts, 1):
+            self.put(
+                key=self.key(
+                    pdf_hash=pdf_hash,
+                    page=page,
+                    settings=settings,
+                    ocr_profile=ocr_profile
+                ),
+                text=text
+            )
+        self.put(
+            key=self.key(
+                pdf_hash=pdf_hash,
+                page=None,
+                settings=settings
+            ),
+            text=json.dumps(
+                obj={
+                    'pages': len(texts),
+                    'profile': ocr_profile
+                }
+            )
+        )
+        self.evict()
+
+    def stats(
+            self
+    ) -> dict[str, int | float]:
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        lookups: int = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0
+        }
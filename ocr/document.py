@@ -0,0 +1,209 @@
+import subprocess
+
+from typing import Callable, Iterator
+
+from . import adaptive
+from .cache import Cache
+from .pool import iterate
+from .text_layer import read
+from .raster import stream, page_count
+
+
+def pages(
+        pdf_path: str,
+        settings: dict,
+        cache: Cache | None = None,
+        profile: Callable[[str], dict] | None = None,
+        report: dict[str, int] | None = None
+) -> Iterator[str]:
+    """
+    Extracts the text of every page of a statement, yielding each page as soon as it is ready.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file
+        settings (dict): The "ocr" section of config.json
+        cache (Cache | None): OCR cache, pages found there are not extracted again
+        profile (Callable[[str], dict] | None): Maps the text of the first page to the
+            adaptive DPI settings of its bank, used when ocr.adaptive is enabled
+        report (dict[str, int] | None): Filled with how many pages came from each source
+
+    Returns:
+        Iterator[str]: The text of every page, in page order
+
+    Pages are taken, in order of preference, from the cache, from the PDF
+    text layer and finally from tesseract, so only scanned pages are
+    rasterized. The cache is written once the last page has been yielded.
+    """
+    report = {} if report is None else report
+    report.update(
+        pages=0,
+        cached=0,
+        text_layer=0,
+        ocr=0,
+        escalated=0
+    )
+
+    pdf_hash: str | None = None
+    if cache:
+        pdf_hash = cache.fingerprint(
+            pdf_path=pdf_path
+        )
+        if (texts := cache.get_document(
+                pdf_hash=pdf_hash,
+                settings=settings,
+                profile=profile
+        )) is not None:
+            report.update(
+                pages=len(texts),
+                cached=len(texts)
+            )
+            yield from texts
+            return
+
+    count: int = page_count(
+        pdf_path=pdf_path
+    )
+    texts: list[str | None] = [None] * count
+
+    if settings['text_layer']['enabled']:
+        try:
+            embedded: list[str | None] = read(
+                pdf_path=pdf_path,
+                min_chars=settings['text_layer']['min_chars']
+            )
+        except (OSError, subprocess.CalledProcessError):
+            embedded = []
+        if len(embedded) == count:
+            texts = embedded
+    report['text_layer'] = sum(
+        text is not None for text in texts
+    )
+
+    # Adaptive settings of the bank, None until a first page tells which bank it is.
+    ocr_profile: dict | None = settings['adaptive']
+    if settings['adaptive']['enabled'] and profile:
+        known: str | None = next(
+            (text for text in texts if text is not None),
+            None
+        )
+        ocr_profile = profile(known) if known is not None else None
+
+    # Cached pages are keyed on the resolved profile, so a scan with no text layer is OCRed again.
+    if cache and ocr_profile is not None:
+        for page, text in enumerate(texts, 1):
+            if text is None:
+                texts[page - 1] = cache.get(
+                    key=cache.key(
+                        pdf_hash=pdf_hash,
+                        page=page,
+                        settings=settings,
+                        ocr_profile=ocr_profile
+                    )
+                )
+
+    missing: list[int] = [
+        page for page, text in enumerate(texts, 1) if text is None
+    ]
+    report.update(
+        pages=count,
+        cached=count - report['text_layer'] - len(missing),
+        ocr=len(missing)
+    )
+
+    # Every page up to `ready` has been yielded already.
+    ready: int = 0
+
+    def flush(
+
+    ) -> Iterator[str]:
+        nonlocal ready
+        while ready < count and texts[ready] is not None:
+            yield texts[ready]
+            ready += 1
+
+    yield from flush()
+
+    if missing and settings['adaptive']['enabled']:
+        if ocr_profile is None:
+            # The bank is told by a first page read with the default ladder.
+            text, rung = next(
+                adaptive.iterate(
+                    pdf_path=pdf_path,
+                    pages=missing[:1],
+                    workers=1,
+                    profile=settings['adaptive'],
+                    lang=settings['lang'],
+                    config=settings['config'],
+                    backend=settings['backend']
+                )
+            )
+            ocr_profile = profile(text)
+            # When the bank has its own ladder the page is read again with it,
+            # every page of the document is cached under the profile it was read with.
+            if ocr_profile == settings['adaptive']:
+                texts[missing.pop(0) - 1] = text
+                report['escalated'] += rung > 0
+                yield from flush()
+
+        for page, (text, rung) in zip(
+                missing,
+                adaptive.iterate(
+                    pdf_path=pdf_path,
+                    pages=missing,
+                    workers=settings['workers'],
+                    profile=ocr_profile,
+                    lang=settings['lang'],
+                    config=settings['config'],
+                    backend=settings['backend']
+                )
+        ):
+            texts[page - 1] = text
+            report['escalated'] += rung > 0
+            yield from flush()
+    elif missing:
+        for page, text in zip(
+                missing,
+                iterate(
+                    images=stream(
+                        dpi=settings['dpi'],
+                        window=settings['window'],
+                        pdf_path=pdf_path,
+                        pages=missing
+                    ),
+                    workers=settings['workers'],
+                    lang=settings['lang'],
+                    config=settings['config'],
+                    backend=settings['backend']
+                )
+        ):
+            texts[page - 1] = text
+            yield from flush()
+
+    if cache:
+        cache.put_document(
+            pdf_hash=pdf_hash,
+            settings=settings,
+            texts=texts,
+            ocr_profile=ocr_profile
+        )
+
+
+def extract(
+        pdf_path: str,
+        settings: dict,
+        cache: Cache | None = None,
+        profile: Callable[[str], dict] | None = None,
+        report: dict[str, int] | None = None
+) -> list[str]:
+    """
+    Same as pages(), collecting the text of every page in a list.
+    """
+    return list(
+        pages(
+            pdf_path=pdf_path,
+            settings=settings,
+            cache=cache,
+            profile=profile,
+            report=report
+        )
+    )
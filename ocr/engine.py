@@ -0,0 +1,165 @@
+import re
+
+import pytesseract
+
+from PIL.Image import Image
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+
+class PytesseractEngine:
+    """
+    Runs the tesseract binary through pytesseract, one subprocess per call.
+    """
+    name: str = 'pytesseract'
+
+    def __init__(
+            self,
+            lang: str,
+            config: str
+    ) -> None:
+        self.lang: str = lang
+        self.config: str = config
+
+    def image_to_string(
+            self,
+            image: Image
+    ) -> str:
+        return pytesseract.image_to_string(
+            image=image,
+            lang=self.lang,
+            config=self.config
+        )
+
+    def recognize(
+            self,
+            image: Image
+    ) -> tuple[str, float]:
+        """
+        Returns the page text together with the mean word confidence (0-100).
+        """
+        # One tesseract run writes both the layout text the parsers rely on
+        # and the TSV the word confidences are read from.
+        with pytesseract.pytesseract.save(image) as (output_base, input_filename):
+            pytesseract.pytesseract.run_tesseract(
+                input_filename=input_filename,
+                output_filename_base=output_base,
+                extension='txt',
+                lang=self.lang,
+                config=f'{self.config} -c tessedit_create_tsv=1'.strip()
+            )
+            outputs: list[str] = []
+            for extension in ('txt', 'tsv'):
+                with open(
+                        file=f'{output_base}.{extension}',
+                        mode='r',
+                        encoding='utf-8'
+                ) as f:
+                    outputs.append(f.read())
+        text, tsv = outputs
+
+        data: dict[str, list] = pytesseract.pytesseract.file_to_dict(
+            tsv,
+            '\t',
+            -1
+        )
+        scores: list[float] = [
+            float(conf) for word, conf in zip(
+                data.get('text', []),
+                data.get('conf', [])
+            ) if word.strip() and float(conf) >= 0
+        ]
+
+        return text, sum(scores) / len(scores) if scores else 0.0
+
+    def close(
+            self
+    ) -> None:
+        pass
+
+
+class TesserocrEngine:
+    """
+    Keeps one tesseract instance loaded in the process through tesserocr.
+
+    The traineddata is read once and images are passed from memory, so a
+    page costs only the recognition itself.
+    """
+    name: str = 'tesserocr'
+
+    def __init__(
+            self,
+            lang: str,
+            config: str
+    ) -> None:
+        # tesserocr.PSM and tesserocr.OEM are plain int constants, the numbers go straight through.
+        options: dict = {}
+        if psm := re.search(r'--psm\s+(\d+)', config):
+            options['psm'] = int(psm[1])
+        if oem := re.search(r'--oem\s+(\d+)', config):
+            options['oem'] = int(oem[1])
+
+        self.api = tesserocr.PyTessBaseAPI(
+            lang=lang,
+            **options
+        )
+        for name, value in re.findall(r'-c\s+(\w+)=(\S+)', config):
+            self.api.SetVariable(name, value)
+
+    def image_to_string(
+            self,
+            image: Image
+    ) -> str:
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text()
+
+    def recognize(
+            self,
+            image: Image
+    ) -> tuple[str, float]:
+        """
+        Returns the page text together with the mean word confidence (0-100).
+        """
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text(), float(self.api.MeanTextConf())
+
+    def close(
+            self
+    ) -> None:
+        self.api.End()
+
+
+def create(
+        backend: str,
+        lang: str,
+        config: str
+) -> PytesseractEngine | TesserocrEngine:
+    """
+    Builds the OCR engine selected in config.json.
+
+    Parameters:
+        backend (str): "tesserocr", "pytesseract" or "auto" (tesserocr when installed)
+        lang (str): Tesseract language
+        config (str): Tesseract config string, --psm, --oem and -c options are honored by both backends
+
+    Returns:
+        PytesseractEngine | TesserocrEngine: The engine, pytesseract when tesserocr is not
+            available or, with "auto", when it can't load the language
+    """
+    if backend in ('auto', 'tesserocr') and tesserocr is not None:
+        try:
+            return TesserocrEngine(
+                lang=lang,
+                config=config
+            )
+        except RuntimeError:
+            # tesserocr raises RuntimeError when the traineddata can't be loaded.
+            if backend == 'tesserocr':
+                raise
+    return PytesseractEngine(
+        lang=lang,
+        config=config
+    )
@@ -0,0 +1,154 @@
+import os
+import threading
+
+from typing import Iterable, Iterator
+from PIL.Image import Image
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from . import engine
+
+# One engine per thread: a worker process keeps its tesseract model loaded
+# between pages, and threads of the main process (batch, watch, pipeline
+# stages) never share a tesserocr instance, which is not thread-safe.
+_local = threading.local()
+
+
+def workers_count(
+        workers: int | None
+) -> int:
+    """
+    Resolves the number of OCR worker processes to use.
+
+    Parameters:
+        workers (int | None): Configured worker count, 0 or None means one per CPU core
+
+    Returns:
+        int: Number of worker processes, always at least 1
+    """
+    if not workers or workers < 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _init_worker(
+
+) -> None:
+    # Tesseract spawns its own OpenMP threads, with one process per core they
+    # only fight each other for the same CPUs.
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def get_engine(
+        backend: str,
+        lang: str,
+        config: str
+) -> engine.PytesseractEngine | engine.TesserocrEngine:
+    """
+    Returns the OCR engine of the current thread, creating it on first use.
+    """
+    if getattr(_local, 'key', None) != (backend, lang, config):
+        if getattr(_local, 'engine', None):
+            _local.engine.close()
+        _local.engine = engine.create(
+            backend=backend,
+            lang=lang,
+            config=config
+        )
+        _local.key = (backend, lang, config)
+    return _local.engine
+
+
+def _ocr_page(
+        image: Image,
+        backend: str,
+        lang: str,
+        config: str
+) -> str:
+    return get_engine(
+        backend=backend,
+        lang=lang,
+        config=config
+    ).image_to_string(
+        image=image
+    )
+
+
+def iterate(
+        images: Iterable[Image],
+        workers: int | None,
+        lang: str,
+        config: str,
+        backend: str = 'auto'
+) -> Iterator[str]:
+    """
+    Runs OCR over the pages of a statement using a pool of worker processes.
+
+    Parameters:
+        images (Iterable[Image]): Rasterized pages, in page order
+        workers (int | None): Number of worker processes, 0 or None for one per CPU core
+        lang (str): Tesseract language
+        config (str): Tesseract config string
+        backend (str): OCR engine, see ocr.engine.create
+
+    Returns:
+        Iterator[str]: The text of every page, in the same order as the images,
+            each one as soon as it and the pages before it are done
+
+    At most one page per worker is in flight, so a lazy iterable (see
+    ocr.raster.stream) is only consumed as fast as the workers free up.
+    """
+    workers = workers_count(
+        workers=workers
+    )
+
+    if workers <= 1:
+        for image in images:
+            yield _ocr_page(
+                image=image,
+                backend=backend,
+                lang=lang,
+                config=config
+            )
+        return
+
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker
+    ) as executor:
+        pending: deque = deque()
+        for image in images:
+            pending.append(
+                executor.submit(
+                    _ocr_page,
+                    image,
+                    backend,
+                    lang,
+                    config
+                )
+            )
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run(
+        images: Iterable[Image],
+        workers: int | None,
+        lang: str,
+        config: str,
+        backend: str = 'auto'
+) -> list[str]:
+    """
+    Same as iterate(), collecting the text of every page in a list.
+    """
+    return list(
+        iterate(
+            images=images,
+            workers=workers,
+            lang=lang,
+            config=config,
+            backend=backend
+        )
+    )
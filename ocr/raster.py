@@ -0,0 +1,78 @@
+import pdf2image
+
+from typing import Iterator
+from PIL.Image import Image
+
+
+def page_count(
+        pdf_path: str
+) -> int:
+    """
+    Reads the number of pages of a PDF without rasterizing it.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file
+
+    Returns:
+        int: Number of pages in the document
+    """
+    return int(
+        pdf2image.pdfinfo_from_path(
+            pdf_path=pdf_path
+        )['Pages']
+    )
+
+
+def stream(
+        pdf_path: str,
+        dpi: int,
+        window: int = 1,
+        pages: list[int] | None = None
+) -> Iterator[Image]:
+    """
+    Rasterizes a PDF a few pages at a time instead of the whole document at once.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file
+        dpi (int): Render resolution
+        window (int): Maximum number of pages rendered per pdftoppm call
+        pages (list[int] | None): 1-based page numbers to render, all pages if None
+
+    Returns:
+        Iterator[Image]: The rendered pages, in the order of `pages`
+
+    Only `window` pages are held in memory by the generator, so peak memory
+    does not depend on the length of the statement.
+    """
+    window = max(window, 1)
+    if pages is None:
+        pages = list(
+            range(
+                1,
+                page_count(
+                    pdf_path=pdf_path
+                ) + 1
+            )
+        )
+
+    i = 0
+    while i < len(pages):
+        first_page: int = pages[i]
+        last_page: int = first_page
+        i += 1
+        while (
+                i < len(pages) and
+                pages[i] == last_page + 1 and
+                last_page - first_page + 1 < window
+        ):
+            last_page = pages[i]
+            i += 1
+
+        images: list[Image] = pdf2image.convert_from_path(
+            dpi=dpi,
+            pdf_path=pdf_path,
+            first_page=first_page,
+            last_page=last_page
+        )
+        while images:
+            yield images.pop(0)
@@ -0,0 +1,85 @@
+import subprocess
+
+
+def normalize(
+        text: str
+) -> str:
+    """
+    Puts embedded text in the same shape as the tesseract output.
+
+    Parameters:
+        text (str): Raw text of one page
+
+    Returns:
+        str: Lowercase text, one line per row, single spaced and without blank lines
+    """
+    lines: list[str] = [
+        ' '.join(line.split()) for line in text.lower().split('\n')
+    ]
+    return '\n'.join(
+        line for line in lines if line
+    )
+
+
+def usable(
+        text: str,
+        min_chars: int
+) -> bool:
+    """
+    Decides whether the embedded text of a page can replace OCR.
+
+    Parameters:
+        text (str): Normalized text of the page
+        min_chars (int): Minimum amount of alphanumeric characters
+
+    Returns:
+        bool: False for scanned or empty pages and for broken font encodings
+    """
+    alnum: int = sum(
+        char.isalnum() for char in text
+    )
+    return alnum >= min_chars and text.count('�') * 20 < alnum
+
+
+def read(
+        pdf_path: str,
+        min_chars: int
+) -> list[str | None]:
+    """
+    Reads the text layer of every page with poppler's pdftotext.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file
+        min_chars (int): See usable()
+
+    Returns:
+        list[str | None]: The normalized text of every page, None where the page must be OCRed
+
+    pdftotext ships with poppler, which pdf2image already depends on.
+    """
+    output = subprocess.run(
+        ['pdftotext', '-layout', '-enc', 'UTF-8', pdf_path, '-'],
+        check=True,
+        capture_output=True
+    ).stdout.decode(
+        encoding='utf-8',
+        errors='replace'
+    )
+
+    # Pages are terminated by a form feed, including the last one.
+    pages: list[str] = output.split('\f')
+    if output.endswith('\f'):
+        pages.pop()
+
+    texts: list[str | None] = []
+    for page in pages:
+        text = normalize(
+            text=page
+        )
+        texts.append(
+            text if usable(
+                text=text,
+                min_chars=min_chars
+            ) else None
+        )
+    return texts
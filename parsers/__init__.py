@@ -1 +1 @@
-from .pooler import fetch, run
\ No newline at end of file
+from .pooler import fetch, load, run
\ No newline at end of file
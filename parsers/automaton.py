@@ -0,0 +1,67 @@
+from typing import Generic, Iterable, Iterator, TypeVar
+
+T = TypeVar('T')
+
+
+class Automaton(Generic[T]):
+    """
+    Aho-Corasick multi-pattern matcher.
+
+    All patterns are compiled into one trie with failure links, so a single
+    pass over the text reports every occurrence of every pattern. The cost
+    of a search depends on the length of the text and the number of
+    matches, not on how many patterns there are.
+    """
+
+    def __init__(
+            self,
+            patterns: Iterable[tuple[str, T]]
+    ) -> None:
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.output: list[list[tuple[int, T]]] = [[]]
+
+        for pattern, value in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append((len(pattern), value))
+
+        # Breadth-first pass to set the failure links.
+        queue: list[int] = list(self.goto[0].values())
+        for state in queue:
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def search(
+            self,
+            text: str
+    ) -> Iterator[tuple[int, int, T]]:
+        """
+        Finds every pattern occurrence in the text.
+
+        Parameters:
+            text (str): Text to scan
+
+        Returns:
+            Iterator[tuple[int, int, T]]: (start, end, value) of each match, end excluded
+        """
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, value in self.output[state]:
+                yield index + 1 - length, index + 1, value
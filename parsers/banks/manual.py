@@ -1,8 +1,10 @@
 import re
 
 from datetime import datetime
-from mysql.connector.pooling import PooledMySQLConnection
-from mysql.connector.abstracts import MySQLConnectionAbstract
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from storage import Storage
 
 
 class Modules:
@@ -142,19 +144,13 @@ class Modules:
     def ask_cards_id(
             self,
             line: str,
-            conn: MySQLConnectionAbstract | PooledMySQLConnection | None
+            conn: 'Storage | None'
     ) -> None:
         if re.search(
                 pattern=r'\[[“\"»]*\*\d{4}\]',
                 string=line
         ) and conn:
-            cursor = conn.cursor(
-                dictionary=True
-            )
-            cursor.execute(
-                'SELECT id FROM cards'
-            )
-            cards = cursor.askall()
+            cards = conn.cards()
 
             for card in cards:
                 last_digits = re.findall(
@@ -176,7 +172,6 @@ class Modules:
                         )
                     )
                     break
-            cursor.close()
 
     def ask_category(
             self,
@@ -294,12 +289,13 @@ def refactor(
 def parse(
         runtype,
         args: list[str],
-        conn: MySQLConnectionAbstract | PooledMySQLConnection | None
+        conn: 'Storage | None',
+        modules: Modules | None = None
 ) -> dict[
     str,
     str | int | float | None
 ] | None:
-    __modules = Modules()
+    __modules = modules or Modules()
     __movements: dict = {}
 
     steps = [
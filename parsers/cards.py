@@ -0,0 +1,100 @@
+import threading
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from storage import Storage
+
+
+class CardIndex:
+    """
+    In-memory index of the cards table, keyed on the first and last four digits of the card number.
+
+    Statements only print part of the card number, so a card line used to
+    read the whole table and compare every card. The table is now read
+    once per session, and sync() re-reads it only when its row count or
+    id sum changed since the last load.
+    """
+
+    def __init__(
+            self
+    ) -> None:
+        self.lock = threading.Lock()
+        self.version: tuple | None = None
+        # (first four, last four) -> id and last four -> id, first card in table order wins.
+        self.pairs: dict[tuple[str, str], int] = {}
+        self.suffixes: dict[str, int] = {}
+        self.loads: int = 0
+        self.lookups: int = 0
+
+    def sync(
+            self,
+            storage: 'Storage'
+    ) -> bool:
+        """
+        Loads the cards table when it changed since the last call.
+
+        Returns:
+            bool: Whether the index was (re)loaded
+        """
+        version: tuple = storage.cards_version()
+        with self.lock:
+            if version == self.version:
+                return False
+
+        card_ids: list[int] = storage.cards()
+
+        pairs: dict[tuple[str, str], int] = {}
+        suffixes: dict[str, int] = {}
+        for card_id in card_ids:
+            card_number: str = str(card_id)
+            pairs.setdefault(
+                (card_number[:4], card_number[-4:]),
+                int(card_id)
+            )
+            suffixes.setdefault(
+                card_number[-4:],
+                int(card_id)
+            )
+
+        with self.lock:
+            self.pairs = pairs
+            self.suffixes = suffixes
+            self.version = version
+            self.loads += 1
+        return True
+
+    def lookup(
+            self,
+            last: str,
+            first: str | None = None
+    ) -> int | None:
+        """
+        Returns the id of the card ending in last (and starting with first, when given).
+        """
+        with self.lock:
+            self.lookups += 1
+            if first is None:
+                return self.suffixes.get(last)
+            return self.pairs.get((first, last))
+
+    def stats(
+            self
+    ) -> dict[str, int]:
+        return {
+            'cards': len(self.suffixes),
+            'loads': self.loads,
+            'lookups': self.lookups
+        }
+
+
+_index = CardIndex()
+
+
+def index(
+
+) -> CardIndex:
+    """
+    Returns the card index of the session, shared by every bank parser.
+    """
+    return _index
@@ -0,0 +1,58 @@
+from .automaton import Automaton
+
+
+class BankDetector:
+    """
+    Finds the bank and runtype of a statement from the signatures in config.json.
+
+    Every signature of every bank is compiled into one Aho-Corasick
+    automaton, so detection is a single pass over the beginning of the
+    document whatever the number of banks.
+    """
+
+    def __init__(
+            self,
+            parsers: dict,
+            scan_chars: int
+    ) -> None:
+        self.scan_chars: int = scan_chars
+        self.names: dict[str, str] = {}
+        # (bank, runtype) in config.json order, earlier entries win like before.
+        self.runtypes: list[tuple[str, str]] = []
+        self.signatures: dict[tuple[str, str], int] = {}
+
+        patterns: list[tuple[str, int]] = []
+        for bank, settings in parsers.items():
+            self.names[bank] = settings['name']
+            for runtype, signatures in settings['values'].items():
+                self.runtypes.append((bank, runtype))
+                self.signatures[(bank, runtype)] = len(set(signatures))
+                patterns.extend(
+                    (signature, len(self.runtypes) - 1) for signature in signatures
+                )
+        self.automaton: Automaton[int] = Automaton(patterns)
+
+    def detect(
+            self,
+            text: str
+    ) -> tuple[str | None, str | None, float]:
+        """
+        Detects the statement type from the first scan_chars characters of its text.
+
+        Parameters:
+            text (str): Lowercase statement text, usually its first page
+
+        Returns:
+            tuple[str | None, str | None, float]: Bank key, runtype and the share of that
+                runtype's signatures found (0.0 to 1.0), or (None, None, 0.0)
+        """
+        found: dict[int, set[str]] = {}
+        for start, end, runtype in self.automaton.search(text[:self.scan_chars]):
+            found.setdefault(runtype, set()).add(text[start:end])
+
+        if not found:
+            return None, None, 0.0
+
+        runtype: int = min(found)
+        bank_key, bank_parameter = self.runtypes[runtype]
+        return bank_key, bank_parameter, len(found[runtype]) / self.signatures[(bank_key, bank_parameter)]
@@ -0,0 +1,86 @@
+import hashlib
+import unicodedata
+
+from collections import defaultdict
+
+
+def normalize(
+        counterparty: str | None
+) -> str:
+    """
+    Uppercase counterparty without accents and punctuation, "Padaria São José Ltda." -> "PADARIA SAO JOSE LTDA".
+    """
+    if not counterparty:
+        return ''
+    text: str = unicodedata.normalize(
+        'NFKD',
+        counterparty
+    )
+    text = ''.join(
+        char if char.isalnum() else ' ' for char in text if not unicodedata.combining(char)
+    )
+    return ' '.join(text.upper().split())
+
+
+def fingerprint(
+        movement: dict[
+            str,
+            str | int | float | None
+        ],
+        ordinal: int
+) -> str:
+    """
+    Returns the SHA-1 of the bank, date, value and normalized counterparty of a movement, and its ordinal.
+
+    The ordinal tells apart equal movements of the same statement, like two
+    coffees on the same day: the first one is 0, the second 1 and so on.
+    """
+    key: str = '|'.join((
+        str(movement['banks_id']),
+        str(movement['date']),
+        f'{float(movement["value"]):.2f}',
+        normalize(
+            counterparty=movement['counterparty']
+        ),
+        str(ordinal)
+    ))
+    return hashlib.sha1(
+        key.encode('utf-8')
+    ).hexdigest()
+
+
+def stamp(
+        movements: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ]
+) -> list[
+    dict[
+        str,
+        str | int | float | None
+    ]
+]:
+    """
+    Sets the "fingerprint" of every movement, in statement order.
+
+    Re-importing the same statement gives the same fingerprints, so the
+    insert path can skip or update the rows it already stored.
+    """
+    ordinals: dict[tuple, int] = defaultdict(int)
+    for movement in movements:
+        key: tuple = (
+            movement['banks_id'],
+            movement['date'],
+            f'{float(movement["value"]):.2f}',
+            normalize(
+                counterparty=movement['counterparty']
+            )
+        )
+        movement['fingerprint'] = fingerprint(
+            movement=movement,
+            ordinal=ordinals[key]
+        )
+        ordinals[key] += 1
+    return movements
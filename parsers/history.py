@@ -0,0 +1,137 @@
+import threading
+
+from typing import TYPE_CHECKING
+from collections import Counter
+
+from . import model
+
+if TYPE_CHECKING:
+    from storage import Storage
+
+
+class CounterpartyIndex:
+    """
+    In-memory counterparty -> category counts built from the movements table.
+
+    A counterparty that was already imported keeps its most frequent
+    category, the ML model only runs for counterparties never seen before.
+    """
+
+    def __init__(
+            self
+    ) -> None:
+        self.lock = threading.Lock()
+        self.counts: dict[str, Counter] = {}
+        self.decisive: int = 0
+        self.predicted: int = 0
+
+    @staticmethod
+    def key(
+            counterparty: str | None
+    ) -> str | None:
+        return ' '.join(counterparty.upper().split()) if counterparty else None
+
+    def load(
+            self,
+            storage: 'Storage'
+    ) -> int:
+        """
+        Reads the category counts of every counterparty, once per session.
+
+        Returns:
+            int: Number of distinct counterparties in the index
+        """
+        rows = storage.history()
+
+        with self.lock:
+            self.counts = {}
+            for counterparty, category_name, count in rows:
+                self.counts.setdefault(
+                    self.key(counterparty),
+                    Counter()
+                )[category_name] += int(count)
+            return len(self.counts)
+
+    def add(
+            self,
+            movements: list[
+                dict[
+                    str,
+                    str | int | float | None
+                ]
+            ]
+    ) -> None:
+        """
+        Counts freshly inserted movements, keeping the index in sync without reloading it.
+        """
+        with self.lock:
+            for movement in movements:
+                if (key := self.key(movement['counterparty'])) and movement['category_name']:
+                    self.counts.setdefault(
+                        key,
+                        Counter()
+                    )[movement['category_name']] += 1
+
+    def lookup(
+            self,
+            counterparty: str | None
+    ) -> str | None:
+        with self.lock:
+            categories: Counter | None = self.counts.get(
+                self.key(counterparty)
+            )
+            return categories.most_common(1)[0][0] if categories else None
+
+    def categorize(
+            self,
+            lines: list[str],
+            counterparties: list[str | None]
+    ) -> list[str]:
+        """
+        Categorizes a batch of lines, predicting only those whose counterparty is not indexed.
+        """
+        results: list[str | None] = [
+            self.lookup(
+                counterparty=counterparty
+            ) for counterparty in counterparties
+        ]
+        unseen: list[int] = [
+            i for i, category_name in enumerate(results) if category_name is None
+        ]
+        if unseen:
+            for i, category_name in zip(
+                    unseen,
+                    model.predict(
+                        lines=[lines[i] for i in unseen],
+                        counterparties=[counterparties[i] for i in unseen]
+                    )
+            ):
+                results[i] = category_name
+
+        with self.lock:
+            self.decisive += len(results) - len(unseen)
+            self.predicted += len(unseen)
+        return results
+
+    def stats(
+            self
+    ) -> dict[str, int | float]:
+        total: int = self.decisive + self.predicted
+        return {
+            'counterparties': len(self.counts),
+            'decisive': self.decisive,
+            'predicted': self.predicted,
+            'decisive_rate': self.decisive / total if total else 0.0
+        }
+
+
+_index = CounterpartyIndex()
+
+
+def index(
+
+) -> CounterpartyIndex:
+    """
+    Returns the counterparty index of the session, shared by every bank parser.
+    """
+    return _index
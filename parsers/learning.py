@@ -0,0 +1,172 @@
+import os
+import json
+import threading
+
+import joblib
+import numpy
+
+from sklearn.linear_model import SGDClassifier
+from sklearn.feature_extraction.text import HashingVectorizer
+
+TRAINING_PATHS: list[str] = [
+    os.path.join(
+        os.path.dirname(__file__),
+        'banks',
+        'mp_category.json'
+    ),
+    os.path.join(
+        os.path.dirname(__file__),
+        'banks',
+        'inter_category.json'
+    )
+]
+N_FEATURES: int = 2 ** 18
+
+
+class OnlineModel:
+    """
+    Category classifier that learns from confirmed imports without a full refit.
+
+    Lines go through a fixed-size HashingVectorizer, so there is no
+    vocabulary to rebuild, and an SGDClassifier with log loss is updated
+    with partial_fit. Confirmed movements are buffered and applied in small
+    batches, and every update is checkpointed to disk.
+
+    partial_fit needs every class up front: the model knows the categories
+    of the training JSONs plus the configured extra classes, fixed when the
+    first checkpoint is written.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            batch_size: int,
+            classes: list[str] | None = None
+    ) -> None:
+        self.path: str = path
+        self.batch_size: int = batch_size
+        self.classes: list[str] = classes or []
+        self.lock = threading.Lock()
+        self.buffer: list[tuple[str, str]] = []
+        self.vectorizer = HashingVectorizer(
+            n_features=N_FEATURES,
+            alternate_sign=False,
+            lowercase=True
+        )
+
+        if os.path.exists(self.path):
+            checkpoint: dict = joblib.load(self.path)
+            self.classifier: SGDClassifier = checkpoint['classifier']
+            self.updates: int = checkpoint['updates']
+        else:
+            self.classifier = SGDClassifier(
+                loss='log_loss',
+                random_state=42
+            )
+            self.updates = 0
+            self.bootstrap()
+
+    @property
+    def version(
+            self
+    ) -> str:
+        return f'online-{self.updates}'
+
+    def bootstrap(
+            self
+    ) -> None:
+        """
+        Seeds the model with the bundled training JSONs.
+        """
+        lines: list[str] = []
+        categories: list[str] = []
+        for training_path in TRAINING_PATHS:
+            with open(
+                    file=training_path,
+                    mode='r',
+                    encoding='utf-8'
+            ) as f:
+                for item in json.load(f):
+                    lines.append(item['description'])
+                    categories.append(item['category'])
+
+        # A few passes, a single one over 70 rows leaves SGD far from converged.
+        for _ in range(5):
+            self.classifier.partial_fit(
+                X=self.vectorizer.transform(lines),
+                y=categories,
+                classes=numpy.array(sorted(set(categories) | set(self.classes)))
+            )
+        self.updates += 1
+        self.checkpoint()
+
+    def predict(
+            self,
+            X: list[str]
+    ) -> numpy.ndarray:
+        with self.lock:
+            return self.classifier.predict(
+                X=self.vectorizer.transform(X)
+            )
+
+    def learn(
+            self,
+            lines: list[str],
+            categories: list[str]
+    ) -> list[str]:
+        """
+        Queues confirmed (line, category) pairs, updating the model once a batch is full.
+
+        Parameters:
+            lines (list[str]): Statement lines of the confirmed movements
+            categories (list[str]): Their final categories, after user corrections
+
+        Returns:
+            list[str]: The categories the model doesn't know, their pairs were ignored
+        """
+        with self.lock:
+            known: set[str] = set(self.classifier.classes_)
+            pairs: list[tuple[str, str]] = [
+                (line, category) for line, category in zip(lines, categories) if category in known
+            ]
+            self.buffer.extend(pairs)
+            full: bool = len(self.buffer) >= self.batch_size
+        if full:
+            self.flush()
+        return sorted({
+            category for category in categories if category and category not in known
+        })
+
+    def flush(
+            self
+    ) -> None:
+        with self.lock:
+            if not self.buffer:
+                return
+            self.classifier.partial_fit(
+                X=self.vectorizer.transform([line for line, _ in self.buffer]),
+                y=[category for _, category in self.buffer]
+            )
+            self.buffer = []
+            self.updates += 1
+        self.checkpoint()
+
+    def checkpoint(
+            self
+    ) -> None:
+        os.makedirs(
+            name=os.path.dirname(self.path),
+            exist_ok=True
+        )
+        with self.lock:
+            joblib.dump(
+                value={
+                    'classifier': self.classifier,
+                    'updates': self.updates
+                },
+                filename=f'{self.path}.tmp'
+            )
+        os.replace(
+            f'{self.path}.tmp',
+            self.path
+        )
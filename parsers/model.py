@@ -0,0 +1,413 @@
+import os
+import re
+import json
+import atexit
+import hashlib
+import threading
+
+from typing import TYPE_CHECKING
+from collections import OrderedDict
+
+# scikit-learn, nltk and joblib are imported where they are used, so that
+# importing a bank parser does not pay for them until a model is needed.
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+    from .learning import OnlineModel
+
+TRAINING_PATH: str = os.path.join(
+    os.path.dirname(__file__),
+    'banks',
+    'mp_category.json'
+)
+STORE_PATH: str = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    '.cache',
+    'models'
+)
+HYPERPARAMETERS: dict = {
+    'lowercase': True,
+    'stop_words': 'portuguese',
+    'max_iter': 1000
+}
+PREDICTION_CACHE_SIZE: int = 4096
+
+# Overridden by configure() with the "categories" section of config.json.
+SETTINGS: dict = {
+    'model': 'tfidf',
+    'learning_batch': 16,
+    'classes': []
+}
+
+_lock = threading.Lock()
+_pipeline: 'Pipeline | None' = None
+_version: str | None = None
+# (mtime, size) of the training JSON when _version was computed.
+_stamp: tuple[int, int] | None = None
+_online: 'OnlineModel | None' = None
+
+
+def configure(
+        settings: dict
+) -> None:
+    """
+    Applies the "categories" section of config.json.
+
+    Parameters:
+        settings (dict): "model" ("tfidf" or "online"), "learning_batch"
+            (confirmed movements per online update) and "classes" (categories
+            the online model accepts besides those of the training data)
+    """
+    SETTINGS.update(settings)
+
+
+def version(
+
+) -> str:
+    """
+    Identifies the category model by what it is trained from.
+
+    Returns:
+        str: Hash of the training JSON, the hyperparameters (including the stop
+            word list) and the scikit-learn version
+    """
+    import sklearn
+    from nltk.corpus import stopwords
+
+    with open(
+            file=TRAINING_PATH,
+            mode='rb'
+    ) as f:
+        training: bytes = f.read()
+    return hashlib.sha256(
+        training +
+        json.dumps(
+            obj=[
+                HYPERPARAMETERS,
+                stopwords.words(HYPERPARAMETERS['stop_words'])
+            ],
+            sort_keys=True
+        ).encode('utf-8') +
+        sklearn.__version__.encode('utf-8')
+    ).hexdigest()[:16]
+
+
+def train(
+
+) -> 'Pipeline':
+    """
+    Fits the TF-IDF + LogisticRegression category pipeline on the training JSON.
+    """
+    from nltk.corpus import stopwords
+    from sklearn.pipeline import Pipeline
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    with open(
+            file=TRAINING_PATH,
+            mode='r',
+            encoding='utf-8'
+    ) as f:
+        data = json.load(f)
+
+    descriptions: list = [
+        item['description'] for item in data
+    ]
+    categories: list = [
+        item['category'] for item in data
+    ]
+
+    pipeline = Pipeline([
+        (
+            'vectorizer',
+            TfidfVectorizer(
+                lowercase=HYPERPARAMETERS['lowercase'],
+                stop_words=stopwords.words(HYPERPARAMETERS['stop_words'])
+            )
+        ),
+        (
+            'classifier',
+            LogisticRegression(
+                max_iter=HYPERPARAMETERS['max_iter']
+            )
+        )
+    ])
+    pipeline.fit(descriptions, categories)
+    return pipeline
+
+
+def load(
+
+) -> 'Pipeline':
+    """
+    Returns the fitted category pipeline shared by every bank parser.
+
+    Returns:
+        Pipeline: The in-memory model, loaded from the artifact store or trained
+            and saved there when the training data or hyperparameters changed
+
+    The version is only hashed again when the training JSON is modified,
+    the stop words and scikit-learn can't change within a process.
+    """
+    import joblib
+
+    global _pipeline, _version, _stamp
+
+    with _lock:
+        stat = os.stat(TRAINING_PATH)
+        stamp: tuple[int, int] = (stat.st_mtime_ns, stat.st_size)
+        if _pipeline is not None and _stamp == stamp:
+            return _pipeline
+        current: str = version()
+        if _pipeline is not None and _version == current:
+            _stamp = stamp
+            return _pipeline
+
+        artifact: str = os.path.join(
+            STORE_PATH,
+            f'category-{current}.joblib'
+        )
+        if os.path.exists(artifact):
+            _pipeline = joblib.load(artifact)
+        else:
+            _pipeline = train()
+            os.makedirs(
+                name=STORE_PATH,
+                exist_ok=True
+            )
+            joblib.dump(
+                value=_pipeline,
+                filename=f'{artifact}.tmp'
+            )
+            os.replace(
+                f'{artifact}.tmp',
+                artifact
+            )
+        _version = current
+        _stamp = stamp
+        return _pipeline
+
+
+class PredictionCache:
+    """
+    Bounded LRU memo of model predictions.
+
+    Entries are keyed on the line with dates, amounts and other digits
+    stripped, plus the counterparty, so the same merchant on another day
+    or with another value reuses the prediction. The whole cache is
+    dropped when the model version changes.
+    """
+
+    def __init__(
+            self,
+            max_size: int,
+            path: str | None = None
+    ) -> None:
+        self.max_size: int = max_size
+        self.path: str | None = path
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self.version: str | None = None
+        self.hits: int = 0
+        self.misses: int = 0
+        self.dirty: bool = False
+
+        if self.path and os.path.exists(self.path):
+            with open(
+                    file=self.path,
+                    mode='r',
+                    encoding='utf-8'
+            ) as f:
+                data = json.load(f)
+            self.version = data['version']
+            self.entries = OrderedDict(data['entries'])
+
+    @staticmethod
+    def normalize(
+            line: str,
+            counterparty: str | None
+    ) -> str:
+        line = re.sub(r'\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?', ' ', line.lower())
+        line = re.sub(r'-?r\$\s?-?\s?[\d.,]+', ' ', line)
+        line = re.sub(r'[\d.,]*\d[\d.,]*', ' ', line)
+        return f'{" ".join(line.split())}|{counterparty or ""}'
+
+    def predict(
+            self,
+            pipeline: 'Pipeline | OnlineModel',
+            version: str,
+            lines: list[str],
+            counterparties: list[str | None]
+    ) -> list[str]:
+        """
+        Predicts the category of every line, running the model only for unseen keys.
+        """
+        keys: list[str] = [
+            self.normalize(
+                line=line,
+                counterparty=counterparty
+            ) for line, counterparty in zip(lines, counterparties)
+        ]
+        results: list[str | None] = []
+
+        with self.lock:
+            if self.version != version:
+                self.entries.clear()
+                self.version = version
+            for key in keys:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    results.append(self.entries[key])
+                else:
+                    self.misses += 1
+                    results.append(None)
+
+        missing: list[int] = [
+            i for i, category_name in enumerate(results) if category_name is None
+        ]
+        if missing:
+            predicted = pipeline.predict(
+                X=[lines[i] for i in missing]
+            )
+            with self.lock:
+                for i, category_name in zip(missing, predicted):
+                    results[i] = str(category_name)
+                    self.entries[keys[i]] = results[i]
+                    self.entries.move_to_end(keys[i])
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                self.dirty = True
+        return results
+
+    def save(
+            self
+    ) -> None:
+        if not self.path or not self.dirty:
+            return
+        with self.lock:
+            os.makedirs(
+                name=os.path.dirname(self.path),
+                exist_ok=True
+            )
+            with open(
+                    file=f'{self.path}.tmp',
+                    mode='w',
+                    encoding='utf-8'
+            ) as f:
+                json.dump(
+                    obj={
+                        'version': self.version,
+                        'entries': list(self.entries.items())
+                    },
+                    fp=f
+                )
+            os.replace(
+                f'{self.path}.tmp',
+                self.path
+            )
+            self.dirty = False
+
+    def stats(
+            self
+    ) -> dict[str, int | float]:
+        lookups: int = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+_predictions: PredictionCache | None = None
+
+
+def predictions(
+
+) -> PredictionCache:
+    """
+    Returns the prediction cache shared by every bank parser, persisted at exit.
+    """
+    global _predictions
+
+    with _lock:
+        if _predictions is None:
+            _predictions = PredictionCache(
+                max_size=PREDICTION_CACHE_SIZE,
+                path=os.path.join(
+                    STORE_PATH,
+                    'predictions.json'
+                )
+            )
+            atexit.register(_predictions.save)
+        return _predictions
+
+
+def online(
+
+) -> 'OnlineModel':
+    """
+    Returns the incremental model, loading its checkpoint on first use.
+    """
+    from .learning import OnlineModel
+
+    global _online
+
+    with _lock:
+        if _online is None:
+            _online = OnlineModel(
+                path=os.path.join(
+                    STORE_PATH,
+                    'online.joblib'
+                ),
+                batch_size=SETTINGS['learning_batch'],
+                classes=SETTINGS['classes']
+            )
+            atexit.register(_online.flush)
+        return _online
+
+
+def warm(
+
+) -> None:
+    """
+    Loads the configured classifier ahead of the first prediction.
+    """
+    if SETTINGS['model'] == 'online':
+        online()
+    else:
+        load()
+
+
+def predict(
+        lines: list[str],
+        counterparties: list[str | None]
+) -> list[str]:
+    """
+    Predicts the category of a batch of lines through the shared prediction cache.
+    """
+    if SETTINGS['model'] == 'online':
+        classifier = online()
+        current: str = classifier.version
+    else:
+        classifier = load()
+        current = _version
+    return predictions().predict(
+        pipeline=classifier,
+        version=current,
+        lines=lines,
+        counterparties=counterparties
+    )
+
+
+def learn(
+        lines: list[str],
+        categories: list[str]
+) -> list[str]:
+    """
+    Feeds confirmed movements to the incremental model, see OnlineModel.learn.
+    """
+    return online().learn(
+        lines=lines,
+        categories=categories
+    )
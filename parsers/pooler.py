@@ -1,46 +1,43 @@
-import os
-import importlib
+from types import ModuleType
+from typing import TYPE_CHECKING
 
-from mysql.connector.pooling import PooledMySQLConnection
-from mysql.connector.abstracts import MySQLConnectionAbstract
+from . import registry, fingerprint
+from .statement import Statement
+
+if TYPE_CHECKING:
+    from storage import Storage
 
 def fetch() -> list[str]:
     """
-    Get a list of all files in the banks directory
+    Get the names of the bank parsers in the banks and specs directories
     Returns:
-        list: A list of filenames from the banks directory
+        list: Module names, discovered once per process by the registry
     """
-    banks_path = os.path.join(
-        os.path.dirname(__file__),
-        'banks'
-    )
+    return registry.index().keys()
 
-    if not os.path.exists(banks_path):
-        os.makedirs(banks_path)
-        raise FileNotFoundError('Banks folder not found!')
 
-    files: list[str] = [
-        f for f in os.listdir(
-            banks_path
-        ) if os.path.isfile(
-            os.path.join(banks_path, f)
-        )
-    ]
+def load(
+        parser: str
+) -> ModuleType | Statement:
+    """
+    Returns a bank parser, built from its spec or imported from the banks directory.
 
-    file_names: list[str] = [
-        os.path.splitext(
-            p=file
-        )[0] for file in files if file.endswith('.py')
-    ]
+    Parameters:
+        parser (str): Bank name, as returned by fetch()
 
-    return file_names
+    Returns:
+        module: The bank parser, exposing Modules, stream, finalize and parse
+    """
+    return registry.index().get(
+        key=parser
+    ).module()
 
 
 def run(
         parser: str,
         runtype: str,
         args: list[str] | str,
-        conn: MySQLConnectionAbstract | PooledMySQLConnection | None
+        conn: 'Storage | None'
 ) -> list[
     dict[
         str,
@@ -48,11 +45,21 @@ def run(
     ]
 ] | None:
 
-    modules = importlib.import_module(
-        name=f'parsers.banks.{parser}'
-    )
-    return modules.parse(
-        conn=conn,
-        args=args,
-        runtype=runtype
+    plugin = registry.index().get(
+        key=parser
     )
+    modules = plugin.acquire()
+    try:
+        movements = plugin.module().parse(
+            conn=conn,
+            args=args,
+            runtype=runtype,
+            modules=modules
+        )
+        return fingerprint.stamp(
+            movements=movements
+        ) if movements else movements
+    finally:
+        plugin.release(
+            modules=modules
+        )
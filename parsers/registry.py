@@ -0,0 +1,186 @@
+import os
+import json
+import importlib
+import threading
+
+from types import ModuleType
+
+from . import model, spec, statement
+from .statement import Statement
+
+CONFIG_PATH: str = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    'config.json'
+)
+BANKS_PATH: str = os.path.join(
+    os.path.dirname(__file__),
+    'banks'
+)
+
+
+class Plugin:
+    """
+    A bank parser and what config.json says about it.
+
+    Banks with a spec in parsers/specs are parsed by parsers.statement,
+    with the hooks of parsers/banks/<bank>.py when there is one; other
+    modules of the banks directory are used as they are. The parser is
+    built on first use only, and the Modules instances
+    it hands out are kept once released, so the next file of the same
+    bank reuses an instance whose model is already loaded instead of
+    paying for the import and the warm-up again.
+    """
+
+    def __init__(
+            self,
+            key: str,
+            metadata: dict | None
+    ) -> None:
+        self.key: str = key
+        self.name: str = (metadata or {}).get('name', key)
+        # runtype -> signatures, in config.json order.
+        self.signatures: dict[str, list[str]] = (metadata or {}).get('values', {})
+        self.lock = threading.Lock()
+        self._module: ModuleType | Statement | None = None
+        self._idle: list = []
+
+    @property
+    def runtypes(
+            self
+    ) -> list[str]:
+        return list(self.signatures)
+
+    def module(
+            self
+    ) -> ModuleType | Statement:
+        """
+        Compiles the spec, or imports the bank module, the first time it is needed.
+        """
+        with self.lock:
+            if self._module is None and self.key in spec.available():
+                hooks: ModuleType | None = importlib.import_module(
+                    name=f'parsers.banks.{self.key}'
+                ) if os.path.isfile(os.path.join(BANKS_PATH, f'{self.key}.py')) else None
+                self._module = Statement(
+                    spec=spec.load(
+                        key=self.key
+                    ),
+                    modules=hooks.Modules if hooks else statement.Modules
+                )
+            elif self._module is None:
+                self._module = importlib.import_module(
+                    name=f'parsers.banks.{self.key}'
+                )
+            return self._module
+
+    def acquire(
+            self
+    ):
+        """
+        Checks out a Modules instance with a clean per-file state.
+
+        Instances are not shared between concurrent files, an idle one is
+        reused when there is one and a new one is created otherwise.
+        """
+        bank: ModuleType | Statement = self.module()
+        with self.lock:
+            if self._idle:
+                modules = self._idle.pop()
+                modules.reset()
+                return modules
+        model.warm()
+        return bank.Modules()
+
+    def release(
+            self,
+            modules
+    ) -> None:
+        with self.lock:
+            self._idle.append(modules)
+
+
+class Registry:
+    """
+    Bank parsers found in the banks and specs directories, listed once per process.
+    """
+
+    def __init__(
+            self,
+            parsers: dict,
+            path: str = BANKS_PATH
+    ) -> None:
+        if not os.path.exists(path):
+            os.makedirs(path)
+            raise FileNotFoundError('Banks folder not found!')
+
+        self.plugins: dict[str, Plugin] = {
+            os.path.splitext(file)[0]: Plugin(
+                key=os.path.splitext(file)[0],
+                metadata=parsers.get(os.path.splitext(file)[0])
+            ) for file in sorted(os.listdir(path))
+            if file.endswith('.py')
+            and file != '__init__.py'
+            and os.path.isfile(os.path.join(path, file))
+        }
+        for key in spec.available():
+            if key not in self.plugins:
+                self.plugins[key] = Plugin(
+                    key=key,
+                    metadata=parsers.get(key)
+                )
+
+    def __contains__(
+            self,
+            key: str
+    ) -> bool:
+        return key in self.plugins
+
+    def keys(
+            self
+    ) -> list[str]:
+        return list(self.plugins)
+
+    def get(
+            self,
+            key: str
+    ) -> Plugin:
+        return self.plugins[key]
+
+
+_lock = threading.Lock()
+_registry: Registry | None = None
+
+
+def configure(
+        parsers: dict
+) -> None:
+    """
+    Discovers the bank parsers once, with the "parsers" section of config.json as metadata.
+    """
+    global _registry
+
+    with _lock:
+        _registry = Registry(
+            parsers=parsers
+        )
+
+
+def index(
+
+) -> Registry:
+    """
+    Returns the parser registry, reading config.json on first use if configure() was not called.
+    """
+    global _registry
+
+    with _lock:
+        if _registry is None:
+            with open(
+                    file=CONFIG_PATH,
+                    mode='r',
+                    encoding='utf-8'
+            ) as f:
+                _registry = Registry(
+                    parsers=json.load(f)['parsers']
+                )
+        return _registry
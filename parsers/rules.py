@@ -0,0 +1,120 @@
+import os
+import json
+import threading
+
+from .automaton import Automaton
+
+CONFIG_PATH: str = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    'config.json'
+)
+
+
+class RuleEngine:
+    """
+    Applies the literal rules of config.json to statement lines and counterparties.
+
+    A rule looks like:
+        {
+            "field": "counterparty" | "line",
+            "match": "contains" | "exact",
+            "patterns": ["SILVIA", "ROSANA"],
+            "set": {"category_name": "FAMILY"},
+            "priority": 50,
+            "banks": ["inter_brasil"]            (optional, every bank if missing)
+        }
+
+    All patterns of a field are compiled into one Aho-Corasick automaton, so
+    a single pass over the text finds every matching rule however many
+    aliases there are. For each attribute, the matching rule with the highest
+    priority wins; on a tie the rule listed first wins. Matching is case
+    insensitive.
+    """
+
+    def __init__(
+            self,
+            rules: list[dict]
+    ) -> None:
+        self.rules: list[dict] = rules
+        self.automata: dict[str, Automaton[int]] = {}
+
+        for field in {rule['field'] for rule in rules}:
+            self.automata[field] = Automaton(
+                (pattern.lower(), index)
+                for index, rule in enumerate(rules) if rule['field'] == field
+                for pattern in rule['patterns']
+            )
+
+    def apply(
+            self,
+            field: str,
+            text: str | None,
+            bank: str | None = None
+    ) -> dict[str, str]:
+        """
+        Finds the values set by the rules matching a text.
+
+        Parameters:
+            field (str): Which rules to use, "line" or "counterparty"
+            text (str | None): The line or the counterparty
+            bank (str | None): Bank module name, rules restricted to other banks are ignored
+
+        Returns:
+            dict[str, str]: The attributes to set (e.g. {"category_name": "FAMILY"}), empty if nothing matches
+        """
+        if not text or field not in self.automata:
+            return {}
+
+        text = text.lower()
+        matched: set[int] = set()
+        for start, end, index in self.automata[field].search(text):
+            rule: dict = self.rules[index]
+            if rule['match'] == 'exact' and (start != 0 or end != len(text)):
+                continue
+            if bank and 'banks' in rule and bank not in rule['banks']:
+                continue
+            matched.add(index)
+
+        values: dict[str, str] = {}
+        for index in sorted(matched, key=lambda i: (self.rules[i].get('priority', 0), -i)):
+            values.update(self.rules[index]['set'])
+        return values
+
+
+_lock = threading.Lock()
+_engine: RuleEngine | None = None
+
+
+def configure(
+        rules: list[dict]
+) -> None:
+    """
+    Compiles the rules once, usually the "rules" section of config.json.
+    """
+    global _engine
+
+    with _lock:
+        _engine = RuleEngine(
+            rules=rules
+        )
+
+
+def engine(
+
+) -> RuleEngine:
+    """
+    Returns the compiled rule engine, reading config.json on first use if configure() was not called.
+    """
+    global _engine
+
+    with _lock:
+        if _engine is None:
+            with open(
+                    file=CONFIG_PATH,
+                    mode='r',
+                    encoding='utf-8'
+            ) as f:
+                _engine = RuleEngine(
+                    rules=json.load(f)['rules']
+                )
+        return _engine
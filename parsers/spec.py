@@ -0,0 +1,284 @@
+import os
+import re
+import json
+import threading
+
+from collections import deque
+from typing import Iterable, Iterator
+
+SPECS_PATH: str = os.path.join(
+    os.path.dirname(__file__),
+    'specs'
+)
+
+
+def dates_of(
+        entries: list[dict]
+) -> list[tuple[re.Pattern, str]]:
+    return [
+        (re.compile(entry['pattern']), entry['format']) for entry in entries
+    ]
+
+
+class Section:
+    """
+    Line state machine of a statement section, like the "despesas da fatura" part of a bill.
+
+    A section is inactive until a line holds one of its start markers and
+    active until a line holds one of its end markers. A line holding both
+    leaves it inactive, as the parsers always did.
+    """
+
+    def __init__(
+            self,
+            start: list[str],
+            end: list[str],
+            method: str | None = None,
+            counterparty: list[str] | None = None,
+            dates: list[dict] | None = None
+    ) -> None:
+        self.start: list[str] = start
+        self.end: list[str] = end
+        # Method of every movement in the section, e.g. CREDIT for card bills.
+        self.method: str | None = method
+        # Read instead of, and in addition to, the statement ones inside the section.
+        self.counterparty: list[re.Pattern] = [
+            re.compile(pattern) for pattern in counterparty or []
+        ]
+        self.dates: list[tuple[re.Pattern, str]] = dates_of(
+            entries=dates or []
+        )
+
+    def feed(
+            self,
+            line: str,
+            active: bool
+    ) -> bool:
+        """
+        Returns whether the section is active after the line.
+        """
+        if any(marker in line for marker in self.start):
+            active = True
+        if active and any(marker in line for marker in self.end):
+            active = False
+        return active
+
+
+class Joiner:
+    """
+    Rebuilds movements that a statement prints over several lines into one line.
+
+    The lines go through a sliding window of "size" lines. A first line
+    matching "skip" is already a full movement and passes through. Otherwise,
+    when the window line at "block_line" matches "block", the window is
+    replaced by "template", formatted with the stripped window lines
+    (line0, line1, ...), the named groups of "block" and "rest", the block
+    line without the group values.
+    """
+
+    def __init__(
+            self,
+            size: int,
+            skip: str,
+            block_line: int,
+            block: str,
+            template: str,
+            runtypes: list[str]
+    ) -> None:
+        self.size: int = size
+        self.skip: re.Pattern = re.compile(skip)
+        self.block_line: int = block_line
+        self.block: re.Pattern = re.compile(block)
+        self.template: str = template
+        self.runtypes: list[str] = runtypes
+
+    def join(
+            self,
+            lines: Iterable[str]
+    ) -> Iterator[str]:
+        window: deque[str] = deque()
+        lines = iter(lines)
+
+        while True:
+            while len(window) < self.size and (line := next(lines, None)) is not None:
+                window.append(line)
+            if not window:
+                return
+
+            line = window[0].strip()
+            if self.skip.match(
+                    string=line
+            ):
+                yield line
+                window.popleft()
+            elif len(window) == self.size:
+                block_line = window[self.block_line].strip()
+                if match := self.block.search(
+                        string=block_line
+                ):
+                    rest = block_line
+                    for value in match.groups():
+                        if value:
+                            rest = rest.replace(value, '')
+                    yield self.template.format(
+                        rest=rest.strip(),
+                        **match.groupdict(),
+                        **{
+                            f'line{index}': window_line.strip() for index, window_line in enumerate(window)
+                        }
+                    )
+
+                    window.clear()
+                else:
+                    window.popleft()
+            else:
+                window.popleft()
+
+
+class Spec:
+    """
+    Declarative description of a bank statement format, read from parsers/specs/<bank>.json.
+
+    A spec looks like:
+        {
+            "id": 5968138149,                        (banks_id of the movements)
+            "name": "Mercado Pago",
+            "sections": {                            (runtype -> Section, optional)
+                "mp_bill": {
+                    "start": ["na fatura"], "end": ["..."], "method": "CREDIT",
+                    "counterparty": ["^\\d{2}/\\d{2}\\s+(.+?)\\s+r\\$"],
+                    "dates": [{"pattern": "^(\\d{2}/\\d{2})", "format": "%d/%m"}]
+                }
+            },
+            "dates": [{"pattern": "^\\d{2}-\\d{2}-\\d{4}", "format": "%d-%m-%Y"}],
+            "counterparty": ["transferência pix (?:enviada|recebida) (.+?)\\s+\\d{9,}", ...],
+            "patterns": {"value": "...", "card": "...", "transaction_id": "..."},
+            "methods": {"PIX": ["pix", "transferencia"], ...},
+            "months": {"June": ["junho", "jun."], ...},     (month names of the dates, optional)
+            "carry_date": false,                     (see parsers.statement)
+            "separators": {"decimal": ",", "thousands": "."},
+            "join": {"runtypes": ["mp_common"], "size": 3, ...}     (see Joiner, optional)
+        }
+
+    Patterns are compiled once. parsers.statement reads every field, see
+    there for what each one means; bank hooks may read more patterns by name.
+    """
+
+    def __init__(
+            self,
+            key: str,
+            data: dict
+    ) -> None:
+        self.key: str = key
+        self.id: int = data['id']
+        self.name: str = data['name']
+        self.sections: dict[str, Section] = {
+            runtype: Section(
+                start=section['start'],
+                end=section['end'],
+                method=section.get('method'),
+                counterparty=section.get('counterparty'),
+                dates=section.get('dates')
+            ) for runtype, section in data.get('sections', {}).items()
+        }
+        self.dates: list[tuple[re.Pattern, str]] = dates_of(
+            entries=data.get('dates', [])
+        )
+        self.counterparty: list[re.Pattern] = [
+            re.compile(pattern) for pattern in data.get('counterparty', [])
+        ]
+        self.patterns: dict[str, re.Pattern] = {
+            name: re.compile(pattern) for name, pattern in data.get('patterns', {}).items()
+        }
+        self.methods: dict[str, list[str]] = data.get('methods', {})
+        # Month name without the abbreviation dot -> English month, for %B.
+        self.months: dict[str, str] = {
+            name.rstrip('.'): month
+            for month, names in data.get('months', {}).items() for name in names
+        }
+        self.carry_date: bool = data.get('carry_date', False)
+        separators: dict[str, str] = data.get('separators', {})
+        self.decimal_separator: str = separators.get('decimal', ',')
+        self.thousands_separator: str = separators.get('thousands', '.')
+        # Everything but the digits, the sign and the separators, e.g. "r$" and spaces.
+        self.noise: re.Pattern = re.compile(
+            r'[^\d\-' + re.escape(self.decimal_separator + self.thousands_separator) + ']'
+        )
+        self.join: Joiner | None = Joiner(
+            **data['join']
+        ) if data.get('join') else None
+
+    def method(
+            self,
+            line: str
+    ) -> str:
+        # Last method whose word is in the line, in spec order.
+        found: str = ''
+        for method, words in self.methods.items():
+            for word in words:
+                if word in line:
+                    found = method
+        return found
+
+    def amount(
+            self,
+            text: str
+    ) -> float:
+        """
+        Reads an amount as printed, e.g. "-r$ 1.234,56" -> -1234.56, 0.0 when there is no number.
+        """
+        try:
+            return float(
+                self.noise.sub(
+                    '',
+                    text
+                ).replace(
+                    self.thousands_separator,
+                    ''
+                ).replace(
+                    self.decimal_separator,
+                    '.'
+                )
+            )
+        except ValueError:
+            return 0.0
+
+
+_lock = threading.Lock()
+_specs: dict[str, Spec] = {}
+
+
+def available(
+        path: str = SPECS_PATH
+) -> list[str]:
+    """
+    Lists the banks that have a spec file.
+    """
+    if not os.path.exists(path):
+        return []
+    return sorted(
+        os.path.splitext(file)[0] for file in os.listdir(path) if file.endswith('.json')
+    )
+
+
+def load(
+        key: str
+) -> Spec:
+    """
+    Returns the compiled spec of a bank, reading parsers/specs/<key>.json on first use.
+    """
+    with _lock:
+        if key not in _specs:
+            with open(
+                    file=os.path.join(
+                        SPECS_PATH,
+                        f'{key}.json'
+                    ),
+                    mode='r',
+                    encoding='utf-8'
+            ) as f:
+                _specs[key] = Spec(
+                    key=key,
+                    data=json.load(f)
+                )
+        return _specs[key]
@@ -0,0 +1,478 @@
+import functools
+
+from datetime import datetime
+from typing import Iterable, Iterator, TYPE_CHECKING
+from collections import defaultdict
+
+from . import rules, history, cards
+from .spec import Spec, Section
+from .steps import Steps
+
+if TYPE_CHECKING:
+    from storage import Storage
+
+
+class Modules:
+    """
+    Line parser of a bank statement, driven by the bank spec (see parsers.spec.Spec).
+
+    Every bank runs through these stages. The spec fields are read as:
+        sections          a runtype with a section only takes movements from inside it,
+                          with a date, and the section method wins
+        dates             the first groups joined by spaces (the whole match without
+                          groups) in "format", month names translated through "months";
+                          the current year is used when the format has none, a later
+                          match wins, the section dates are read after the statement ones
+        carry_date        outside a section, a date line is a day header: its date stays
+                          until the next one and the line is no movement
+        counterparty      group 1 of the first pattern found in the line; inside a section
+                          the section patterns are used, stripped
+        patterns          "transaction_id" (group 1, or the match), "value" (group 1, or the
+                          match, see Spec.amount) and "card" (groups "first", optional, and
+                          "last", looked up in parsers.cards)
+
+    A bank whose format needs more than the spec subclasses Modules in
+    parsers/banks/<bank>.py and overrides the fetch_* stages it needs.
+    """
+
+    def __init__(
+            self,
+            spec: Spec
+    ) -> None:
+        self.spec: Spec = spec
+        self.compiled: dict[str, Steps] = {}
+        self.reset()
+
+    def reset(
+            self
+    ) -> None:
+        """
+        Clears the per-file state, so a registry instance can parse the next statement.
+        """
+        self.transaction_id: int | None = None
+        self.date: str = ''
+        self.description: str | None = None
+        self.value: float = 0.0
+        self.counterparty: str | None = None
+        self.method: str = ''
+        self.cards_id: int | None = None
+        self.category_name: str | None = None
+
+        self.section_line = False
+        self.date_line = False
+
+        self.conn: 'Storage | None' = None
+        for steps in self.compiled.values():
+            steps.reset()
+
+    def steps(
+            self,
+            runtype: str
+    ) -> Steps:
+        """
+        Returns the line stages of a runtype, bound to this instance on first use.
+        """
+        if runtype not in self.compiled:
+            section = self.spec.sections.get(runtype)
+            stages: list = []
+            if section:
+                stages += [
+                    ('analyze', functools.partial(
+                        self.analyze,
+                        section=section
+                    )),
+                    ('fetch_cards_id', lambda line: self.fetch_cards_id(
+                        line=line
+                    ) if self.conn else None),
+                    ('section', lambda line: self.section_line)
+                ]
+            if 'transaction_id' in self.spec.patterns:
+                stages.append(('fetch_transaction_id', self.fetch_transaction_id))
+            stages += [
+                ('fetch_date', functools.partial(
+                    self.fetch_date,
+                    section=section
+                )),
+                ('fetch_value', self.fetch_value),
+                ('movement', lambda line: not self.discarded(
+                    runtype=runtype
+                )),
+                ('fetch_description', self.fetch_description),
+                ('fetch_counterparty', functools.partial(
+                    self.fetch_counterparty,
+                    section=section
+                )),
+                ('fetch_method', functools.partial(
+                    self.fetch_method,
+                    section=section
+                ))
+            ]
+            self.compiled[runtype] = Steps(
+                stages=stages,
+                finish=functools.partial(
+                    self.finish,
+                    runtype=runtype
+                )
+            )
+        return self.compiled[runtype]
+
+    def analyze(
+            self,
+            line: str,
+            section: Section
+    ) -> None:
+        self.section_line = section.feed(
+            line=line,
+            active=self.section_line
+        )
+
+    def fetch_transaction_id(
+            self,
+            line: str
+    ) -> None:
+        if match := self.spec.patterns['transaction_id'].search(
+                string=line
+        ):
+            self.transaction_id = int(match[1] if match.groups() else match[0])
+
+    def fetch_date(
+            self,
+            line: str,
+            section: Section | None
+    ) -> None:
+        dates = self.spec.dates + section.dates if section and self.section_line else self.spec.dates
+        for pattern, date_format in dates:
+            if not (match := pattern.search(
+                    string=line
+            )):
+                continue
+            date_str: str = ' '.join(
+                self.spec.months.get(group.rstrip('.'), group) for group in match.groups() if group
+            ) if match.groups() else match[0]
+            if '%Y' not in date_format:
+                date_str, date_format = f'{date_str} {datetime.now().year}', f'{date_format} %Y'
+            try:
+                self.date = datetime.strptime(date_str, date_format).date().strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+            self.date_line = self.spec.carry_date and not self.section_line
+
+    def fetch_value(
+            self,
+            line: str
+    ) -> None:
+        if match := self.spec.patterns['value'].search(
+                string=line
+        ):
+            self.value = self.spec.amount(
+                text=match[1] if match.groups() else match[0]
+            )
+
+    def fetch_counterparty(
+            self,
+            line: str,
+            section: Section | None
+    ) -> None:
+        inside: bool = bool(section and self.section_line)
+        for pattern in section.counterparty if inside else self.spec.counterparty:
+            if match := pattern.search(
+                    string=line
+            ):
+                self.counterparty = (match[1].strip() if inside else match[1]).upper()
+                return
+
+    def fetch_description(
+            self,
+            line: str
+    ) -> None:
+        self.description = rules.engine().apply(
+            field='line',
+            text=line,
+            bank=self.spec.key
+        ).get(
+            'description',
+            self.description
+        )
+
+    def fetch_method(
+            self,
+            line: str,
+            section: Section | None
+    ) -> None:
+        if section and self.section_line and section.method:
+            self.method = section.method
+        else:
+            self.method = self.spec.method(
+                line=line
+            ) or self.method
+
+    def fetch_cards_id(
+            self,
+            line: str
+    ) -> None:
+        if 'card' in self.spec.patterns and (match := self.spec.patterns['card'].search(
+                string=line
+        )):
+            self.cards_id = cards.index().lookup(
+                last=match['last'],
+                first=match.groupdict().get('first')
+            )
+
+    def override(
+            self,
+            category_name: str,
+            counterparty: str | None
+    ) -> str:
+        return rules.engine().apply(
+            field='counterparty',
+            text=counterparty,
+            bank=self.spec.key
+        ).get(
+            'category_name',
+            category_name
+        )
+
+    def categories(
+            self,
+            lines: list[str],
+            counterparties: list[str | None]
+    ) -> list[str]:
+        # Known counterparties take their category from the movements
+        # history, the rest go through one batched, memoized predict().
+        predicted = history.index().categorize(
+            lines=lines,
+            counterparties=counterparties
+        ) if lines else []
+
+        return [
+            self.override(
+                category_name=str(category_name),
+                counterparty=counterparty
+            ) for category_name, counterparty in zip(
+                predicted,
+                counterparties
+            )
+        ]
+
+    def fetch_category(
+            self,
+            line: str
+    ) -> None:
+        self.category_name = self.categories(
+            lines=[line],
+            counterparties=[self.counterparty]
+        )[0]
+
+    def classify(
+            self,
+            movements: list[
+                dict[
+                    str,
+                    str | int | float | None
+                ]
+            ],
+            lines: list[str]
+    ) -> None:
+        # Only reads the movements, never the line state, so it can run on
+        # another thread while the next lines are being parsed.
+        for movement, category_name in zip(
+                movements,
+                self.categories(
+                    lines=lines,
+                    counterparties=[
+                        movement['counterparty'] for movement in movements
+                    ]
+                )
+        ):
+            movement['category_name'] = category_name
+
+    def discarded(
+            self,
+            runtype: str
+    ) -> bool:
+        # Whether finish() will drop the current line.
+        return (
+            self.date_line or
+            (runtype in self.spec.sections and (not self.section_line or self.date == '')) or
+            self.value == 0.0
+        )
+
+    def finish(
+            self,
+            runtype: str
+    ) -> dict[
+        str,
+        str | int | float | None
+    ] | None:
+        processed = {
+            "transaction_id": self.transaction_id,
+            "date": self.date,
+            "description": self.description,
+            "value": self.value,
+            "counterparty": self.counterparty,
+            "method": self.method,
+            "banks_id": self.spec.id,
+            "banks_name": self.spec.name,
+            "cards_id": self.cards_id,
+            "category_name": self.category_name
+        }
+
+        if self.discarded(
+                runtype=runtype
+        ):
+            processed = None
+        self.date_line = False
+
+        self.transaction_id = None
+        self.date = self.date if self.spec.carry_date and not self.section_line else ''
+        self.description = None
+        self.value = 0.0
+        self.counterparty = None
+        self.method = ''
+        self.cards_id = self.cards_id if self.section_line else None
+        self.category_name = None
+
+        return processed
+
+
+def stream(
+        runtype,
+        pages: Iterable[str],
+        conn: 'Storage | None',
+        modules: Modules
+) -> Iterator[
+    tuple[
+        dict[
+            str,
+            str | int | float | None
+        ],
+        str
+    ]
+]:
+    join = modules.spec.join
+    raw_lines: list[str] = []
+
+    def lines(
+
+    ) -> Iterator[str]:
+        for page in pages:
+            for line in page.lower().split('\n'):
+                raw_lines.append(line)
+                yield line
+
+    def source(
+
+    ) -> Iterator[str]:
+        if not join or runtype not in join.runtypes:
+            yield from lines()
+            return
+
+        # Statements the block join finds nothing in are parsed line by line.
+        joined = False
+        for line in join.join(
+                lines=lines()
+        ):
+            joined = True
+            yield line
+        if not joined:
+            yield from raw_lines
+
+    modules.conn = conn
+    if conn:
+        cards.index().sync(
+            storage=conn
+        )
+    steps: Steps = modules.steps(
+        runtype=runtype
+    )
+    for line in source():
+        movement = steps.run(
+            line=line
+        )
+
+        if movement:
+            yield movement, line
+
+
+def finalize(
+        movements: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ]
+) -> list[
+    dict[
+        str,
+        str | int | float | None
+    ]
+]:
+    # Repeated transaction ids get a -1, -2, ... suffix.
+    id_counts = defaultdict(int)
+    for m in movements:
+        if tid := m['transaction_id']:
+            id_counts[tid] += 1
+
+    dup_counts = defaultdict(int)
+    for m in movements:
+        tid = m['transaction_id']
+        if tid and id_counts[tid] > 1:
+            dup_counts[tid] += 1
+            m['transaction_id'] = f'{tid}-{dup_counts[tid]}'
+
+    return movements
+
+
+class Statement:
+    """
+    A bank parser built from its spec, with the interface of a bank module (Modules, stream, finalize, parse).
+
+    The registry builds one per bank with a spec, with the Modules subclass
+    of parsers/banks/<bank>.py when the bank has hooks.
+    """
+
+    def __init__(
+            self,
+            spec: Spec,
+            modules: type[Modules] = Modules
+    ) -> None:
+        self.spec: Spec = spec
+        self.Modules = functools.partial(
+            modules,
+            spec=spec
+        )
+        self.stream = stream
+        self.finalize = finalize
+
+    def parse(
+            self,
+            runtype,
+            args: list[str],
+            conn: 'Storage | None',
+            modules: Modules | None = None
+    ) -> list[
+        dict[
+            str,
+            str | int | float | None
+        ]
+    ] | None:
+        modules = modules or self.Modules()
+        movements: list = []
+        lines: list[str] = []
+
+        for movement, line in stream(
+                runtype=runtype,
+                pages=args,
+                conn=conn,
+                modules=modules
+        ):
+            movements.append(movement)
+            lines.append(line)
+
+        modules.classify(
+            movements=movements,
+            lines=lines
+        )
+        return finalize(
+            movements=movements
+        )
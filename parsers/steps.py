@@ -0,0 +1,58 @@
+from typing import Callable
+
+
+class Steps:
+    """
+    The per-line extraction of a bank runtype, compiled once into bound stage callables.
+
+    Stages run in order on every line. A stage that returns False is a
+    gate: the line can no longer produce a movement, so the remaining
+    stages are skipped and only finish runs, to reset the line state.
+    Cheap gates (section active, amount present) are placed before the
+    regex-heavy stages so most lines of a statement stop early.
+    """
+
+    def __init__(
+            self,
+            stages: list[tuple[str, Callable[[str], bool | None]]],
+            finish: Callable[[], dict | None]
+    ) -> None:
+        self.stages: list[tuple[str, Callable[[str], bool | None]]] = stages
+        self.finish: Callable[[], dict | None] = finish
+        self.hits: list[int] = [0] * len(stages)
+        self.skips: list[int] = [0] * len(stages)
+
+    def run(
+            self,
+            line: str
+    ) -> dict | None:
+        """
+        Runs the stages on a line and returns its movement, None when it has none.
+        """
+        for position, (_, stage) in enumerate(self.stages):
+            self.hits[position] += 1
+            if stage(line) is False:
+                for skipped in range(position + 1, len(self.stages)):
+                    self.skips[skipped] += 1
+                break
+        return self.finish()
+
+    def reset(
+            self
+    ) -> None:
+        self.hits = [0] * len(self.stages)
+        self.skips = [0] * len(self.stages)
+
+    def stats(
+            self
+    ) -> dict[str, dict[str, int]]:
+        return {
+            name: {
+                'hits': hits,
+                'skips': skips
+            } for (name, _), hits, skips in zip(
+                self.stages,
+                self.hits,
+                self.skips
+            )
+        }
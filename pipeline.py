@@ -0,0 +1,352 @@
+import time
+import itertools
+import threading
+
+import utils
+import storage
+
+from queue import Empty, Full, Queue
+from typing import Iterable, Iterator
+from utils import message
+from parsers import model, registry, fingerprint
+
+_DONE = object()
+
+
+def _put(
+        queue: Queue,
+        item,
+        stop: threading.Event
+) -> bool:
+    # Waits for room in the queue, giving up once the pipeline is cancelled.
+    while not stop.is_set():
+        try:
+            queue.put(
+                item,
+                timeout=0.1
+            )
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _close(
+        source: Iterable
+) -> None:
+    if close := getattr(source, 'close', None):
+        close()
+
+
+def _produce(
+        source: Iterable,
+        queue: Queue,
+        errors: list[Exception],
+        stop: threading.Event
+) -> None:
+    try:
+        for item in source:
+            if not _put(
+                    queue=queue,
+                    item=item,
+                    stop=stop
+            ):
+                break
+    except Exception as e:
+        errors.append(e)
+    finally:
+        # Closing the generator chain shuts the OCR pool down when the pipeline is cancelled.
+        _close(
+            source=source
+        )
+        _put(
+            queue=queue,
+            item=_DONE,
+            stop=stop
+        )
+
+
+def _consume(
+        queue: Queue,
+        stop: threading.Event
+) -> Iterator:
+    while not stop.is_set():
+        try:
+            item = queue.get(
+                timeout=0.1
+            )
+        except Empty:
+            continue
+        if item is _DONE:
+            return
+        yield item
+
+
+def _timed(
+        source: Iterable,
+        timings: dict[str, float],
+        key: str
+) -> Iterator:
+    # Adds the time spent producing each item to timings[key].
+    source = iter(source)
+    try:
+        while True:
+            start = time.perf_counter()
+            item = next(source, _DONE)
+            timings[key] = timings.get(key, 0.0) + time.perf_counter() - start
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        _close(
+            source=source
+        )
+
+
+def _stage(
+        source: Iterable,
+        depth: int,
+        errors: list[Exception],
+        stop: threading.Event,
+        threads: list[threading.Thread]
+) -> Iterator:
+    queue: Queue = Queue(
+        maxsize=depth
+    )
+    thread = threading.Thread(
+        target=_produce,
+        args=(source, queue, errors, stop),
+        daemon=True
+    )
+    thread.start()
+    threads.append(thread)
+    return _consume(
+        queue=queue,
+        stop=stop
+    )
+
+
+def _cancel(
+        stop: threading.Event,
+        threads: list[threading.Thread]
+) -> None:
+    # A thread busy on a page finishes it, notices the event and exits.
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def _parse(
+        bank,
+        modules,
+        runtype: str,
+        pages: Iterable[str],
+        conn: storage.Storage | None,
+        depth: int,
+        batch_size: int,
+        timings: dict[str, float],
+        lines: list[str] | None,
+        errors: list[Exception],
+        stop: threading.Event,
+        threads: list[threading.Thread]
+) -> list[
+    dict[
+        str,
+        str | int | float | None
+    ]
+]:
+    # Parser thread feeding batched classification on the calling thread.
+    parse_stage: Iterator[tuple[dict, str]] = _stage(
+        source=_timed(
+            source=bank.stream(
+                runtype=runtype,
+                pages=_timed(
+                    source=pages,
+                    timings=timings,
+                    key='parse_wait'
+                ),
+                conn=conn,
+                modules=modules
+            ),
+            timings=timings,
+            key='parse'
+        ),
+        depth=depth * 64,
+        errors=errors,
+        stop=stop,
+        threads=threads
+    )
+
+    movements: list[
+        dict[
+            str,
+            str | int | float | None
+        ]
+    ] = []
+    batch: list[tuple[dict, str]] = []
+    for item in itertools.chain(parse_stage, [None]):
+        if item is not None:
+            batch.append(item)
+        if batch and (item is None or len(batch) >= batch_size):
+            start = time.perf_counter()
+            modules.classify(
+                movements=[movement for movement, _ in batch],
+                lines=[line for _, line in batch]
+            )
+            timings['classify'] += time.perf_counter() - start
+            movements.extend(
+                movement for movement, _ in batch
+            )
+            if lines is not None:
+                lines.extend(
+                    line for _, line in batch
+                )
+            batch = []
+
+    timings['parse'] -= timings.pop('parse_wait', 0.0)
+    model.predictions().save()
+    if errors:
+        raise errors[0]
+    return fingerprint.stamp(
+        movements=bank.finalize(
+            movements=movements
+        )
+    )
+
+
+def run(
+        pages: Iterable[str],
+        app_info,
+        conn: storage.Storage | None,
+        depth: int = 4,
+        batch_size: int = 64,
+        timings: dict[str, float] | None = None,
+        lines: list[str] | None = None,
+        stages: dict[str, dict[str, int]] | None = None
+) -> list[
+    dict[
+        str,
+        str | int | float | None
+    ]
+] | None:
+    """
+    Extracts the movements of a statement with OCR, parsing and classification running concurrently.
+
+    Parameters:
+        pages (Iterable[str]): Page texts in order, usually the lazy ocr.pages() generator
+        app_info: Application configuration information (loaded from config.json)
+        conn (storage.Storage | None): Storage backend, None to run without database
+        depth (int): Size of the queues between stages
+        batch_size (int): Movements classified per predict() call
+        timings (dict[str, float] | None): Filled with the seconds each stage ("ocr",
+            "parse", "classify") spent working, not counting time waiting on another stage
+        lines (list[str] | None): Filled with the statement line of every returned movement
+        stages (dict[str, dict[str, int]] | None): Filled with how many lines each parser
+            stage ran on ("hits") and was skipped for by an earlier gate ("skips")
+
+    Returns:
+        list[dict[str, str | int | float | None]] | None: The parsed movements, None if no parser matches
+
+    OCR runs on one thread and feeds pages to the parser thread, which feeds
+    movements to the classifier on the calling thread. The bank is detected
+    from the first pages as they arrive, so parsing page N overlaps OCR of
+    page N + 1. The bounded queues keep a slow stage from piling up work.
+    Once run() returns or raises, the stage threads are stopped and the
+    pages iterator is closed, which shuts the OCR pool down.
+    """
+    timings = {} if timings is None else timings
+    timings.update(
+        ocr=0.0,
+        parse=0.0,
+        classify=0.0
+    )
+
+    errors: list[Exception] = []
+    # Set when run() returns or raises, the stage threads stop and close their sources.
+    stop = threading.Event()
+    threads: list[threading.Thread] = []
+    try:
+        ocr_stage: Iterator[str] = _stage(
+            source=_timed(
+                source=pages,
+                timings=timings,
+                key='ocr'
+            ),
+            depth=depth,
+            errors=errors,
+            stop=stop,
+            threads=threads
+        )
+
+        # Signatures are normally on the first page, later pages are only
+        # scanned when it has none.
+        seen: list[str] = []
+        bank_key: str | None = None
+        bank_parameter: str | None = None
+        confidence: float = 0.0
+        for page in ocr_stage:
+            seen.append(page)
+            bank_key, bank_parameter, confidence = utils.detect_bank(
+                app_info=app_info,
+                text=page.lower()
+            )
+            if bank_key:
+                break
+
+        if errors:
+            raise errors[0]
+        if not bank_key or bank_key not in registry.index():
+            message(
+                code=1004,
+                module='parser',
+                args=f'Module "{bank_key}" not found.' if bank_key else 'No modules found to parse.'
+            )
+            return None
+
+        message(
+            code=-1,
+            module='parser',
+            args=f'"{app_info["parsers"][bank_key]["name"]}" detected ({confidence:.0%} of the signatures), Extracting with the model -> ( {bank_parameter} )'
+        )
+
+        plugin = registry.index().get(
+            key=bank_key
+        )
+        bank = plugin.module()
+        modules = plugin.acquire()
+        try:
+            movements = _parse(
+                bank=bank,
+                modules=modules,
+                runtype=bank_parameter,
+                pages=itertools.chain(seen, ocr_stage),
+                conn=conn,
+                depth=depth,
+                batch_size=batch_size,
+                timings=timings,
+                lines=lines,
+                errors=errors,
+                stop=stop,
+                threads=threads
+            )
+            if stages is not None:
+                stages.update(
+                    modules.steps(
+                        runtype=bank_parameter
+                    ).stats()
+                )
+        finally:
+            _cancel(
+                stop=stop,
+                threads=threads
+            )
+            # The parser thread is gone, the modules can go back to the pool.
+            plugin.release(
+                modules=modules
+            )
+        return movements
+    finally:
+        _cancel(
+            stop=stop,
+            threads=threads
+        )
@@ -0,0 +1,455 @@
+import os
+import time
+import sqlite3
+import threading
+import contextlib
+
+import loader
+import database
+
+from typing import Callable, Protocol
+from parsers import fingerprint
+
+
+class Storage(Protocol):
+    """
+    What the app needs from a storage backend, a new one only has to provide these.
+    """
+    name: str
+
+    def insert(
+            self,
+            movements: list[
+                dict[
+                    str,
+                    str | int | float | None
+                ]
+            ],
+            chunk_size: int = 500,
+            mode: str = 'values'
+    ) -> dict:
+        ...
+
+    def cards_version(
+            self
+    ) -> tuple:
+        ...
+
+    def cards(
+            self
+    ) -> list[int]:
+        ...
+
+    def history(
+            self
+    ) -> list[tuple[str, str, int]]:
+        ...
+
+    def stats(
+            self
+    ) -> dict[str, int | float]:
+        ...
+
+    def close(
+            self
+    ) -> None:
+        ...
+
+
+class MySQLStorage:
+    """
+    Movements, cards and history in MySQL, through a pool of connections (see database.Pool).
+    """
+    name: str = 'mysql'
+
+    def __init__(
+            self,
+            pool: database.Pool
+    ) -> None:
+        self.pool: database.Pool = pool
+
+    def query(
+            self,
+            sql: str
+    ) -> list[tuple]:
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql)
+                return cursor.fetchall()
+
+    def insert(
+            self,
+            movements: list[
+                dict[
+                    str,
+                    str | int | float | None
+                ]
+            ],
+            chunk_size: int = 500,
+            mode: str = 'values'
+    ) -> dict:
+        """
+        Inserts movements with loader.insert(), see there for the report.
+        """
+        with self.pool.connection() as conn:
+            return loader.insert(
+                movements=movements,
+                conn=conn,
+                chunk_size=chunk_size,
+                mode=mode
+            )
+
+    def migrate(
+            self
+    ) -> bool:
+        """
+        Adds the fingerprint column to movements with loader.migrate(), see "python main.py migrate".
+        """
+        with self.pool.connection() as conn:
+            return loader.migrate(
+                conn=conn
+            )
+
+    def cards_version(
+            self
+    ) -> tuple:
+        return tuple(
+            self.query(
+                'SELECT COUNT(*), COALESCE(SUM(id), 0) FROM cards'
+            )[0]
+        )
+
+    def cards(
+            self
+    ) -> list[int]:
+        return [
+            int(card_id) for (card_id,) in self.query(
+                'SELECT id FROM cards'
+            )
+        ]
+
+    def history(
+            self
+    ) -> list[tuple[str, str, int]]:
+        """
+        Returns (counterparty, category_name, count) for every known pair.
+        """
+        return self.query(
+            """
+            SELECT counterparty, category_name, COUNT(*)
+            FROM movements
+            WHERE counterparty IS NOT NULL AND category_name IS NOT NULL
+            GROUP BY counterparty, category_name
+            """
+        )
+
+    def stats(
+            self
+    ) -> dict[str, int | float]:
+        return self.pool.stats()
+
+    def close(
+            self
+    ) -> None:
+        self.pool.close()
+
+
+class SQLiteStorage:
+    """
+    Movements, cards and history in an embedded SQLite file, for debug mode, CI and benchmarks.
+
+    The database runs in WAL mode, so readers never wait for the writer.
+    Every thread gets its own connection, and writes go through one lock
+    in batches of chunk_size rows per transaction. The schema is created on
+    first use and mirrors the MySQL tables, with the fingerprint unique key.
+    """
+    name: str = 'sqlite'
+
+    SCHEMA: tuple[str, ...] = (
+        'CREATE TABLE IF NOT EXISTS cards (id INTEGER PRIMARY KEY)',
+        """
+        CREATE TABLE IF NOT EXISTS movements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id TEXT,
+            date TEXT,
+            description TEXT,
+            value REAL,
+            counterparty TEXT,
+            method TEXT,
+            banks_id INTEGER,
+            banks_name TEXT,
+            cards_id INTEGER,
+            category_name TEXT,
+            fingerprint TEXT UNIQUE
+        )
+        """
+    )
+
+    def __init__(
+            self,
+            path: str
+    ) -> None:
+        self.path: str = path
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.connections: list[sqlite3.Connection] = []
+        self.writes: int = 0
+        self.transactions: int = 0
+
+        if os.path.dirname(path):
+            os.makedirs(
+                name=os.path.dirname(path),
+                exist_ok=True
+            )
+        conn = self.connection()
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+
+    def connection(
+            self
+    ) -> sqlite3.Connection:
+        if getattr(self.local, 'conn', None) is None:
+            conn = sqlite3.connect(
+                database=self.path,
+                timeout=30,
+                check_same_thread=False
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Safe with WAL, a crash can only lose the last transactions, never corrupt the file.
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return self.local.conn
+
+    def query(
+            self,
+            sql: str,
+            parameters: tuple | list = ()
+    ) -> list[tuple]:
+        return self.connection().execute(
+            sql,
+            parameters
+        ).fetchall()
+
+    def known(
+            self,
+            conn: sqlite3.Connection,
+            chunk: list[
+                dict[
+                    str,
+                    str | int | float | None
+                ]
+            ]
+    ) -> set[str]:
+        stored: set[str] = set()
+        # Stays under the 999 variables of older SQLite builds.
+        for start in range(0, len(chunk), 900):
+            part = chunk[start:start + 900]
+            stored.update(
+                value for (value,) in conn.execute(
+                    f'SELECT fingerprint FROM movements WHERE fingerprint IN ({", ".join(["?"] * len(part))})',
+                    [movement['fingerprint'] for movement in part]
+                )
+            )
+        return stored
+
+    def write(
+            self,
+            conn: sqlite3.Connection,
+            chunk: list[
+                dict[
+                    str,
+                    str | int | float | None
+                ]
+            ]
+    ) -> None:
+        conn.executemany(
+            f'INSERT INTO movements ({", ".join(loader.COLUMNS)}) VALUES ({", ".join(["?"] * len(loader.COLUMNS))}) '
+            'ON CONFLICT (fingerprint) DO UPDATE SET ' + ', '.join(
+                f'{column} = excluded.{column}' for column in loader.UPDATED
+            ),
+            [
+                loader.row(
+                    movement=movement
+                ) for movement in chunk
+            ]
+        )
+
+    def insert(
+            self,
+            movements: list[
+                dict[
+                    str,
+                    str | int | float | None
+                ]
+            ],
+            chunk_size: int = 500,
+            mode: str = 'values'
+    ) -> dict:
+        """
+        Inserts movements in transactions of chunk_size rows, with the same report as loader.insert().
+
+        The mode is ignored, every chunk is one executemany() call.
+        """
+        if any('fingerprint' not in movement for movement in movements):
+            fingerprint.stamp(
+                movements=movements
+            )
+
+        report: dict = {
+            'rows': len(movements),
+            'chunks': 0,
+            'inserted': [],
+            'skipped': [],
+            'failed': [],
+            'seconds': 0.0
+        }
+        conn = self.connection()
+        start = time.perf_counter()
+        with self.write_lock:
+            for index, chunk in enumerate(loader.chunks(
+                    movements=movements,
+                    chunk_size=chunk_size
+            )):
+                report['chunks'] += 1
+                stored: set[str] = self.known(
+                    conn=conn,
+                    chunk=chunk
+                )
+                report['skipped'].extend(
+                    movement for movement in chunk if movement['fingerprint'] in stored
+                )
+                chunk = [
+                    movement for movement in chunk if movement['fingerprint'] not in stored
+                ]
+                if not chunk:
+                    continue
+                try:
+                    with conn:
+                        self.write(
+                            conn=conn,
+                            chunk=chunk
+                        )
+                    self.transactions += 1
+                    self.writes += len(chunk)
+                    report['inserted'].extend(chunk)
+                except sqlite3.Error as e:
+                    offending: list = []
+                    for movement in chunk:
+                        try:
+                            with conn:
+                                self.write(
+                                    conn=conn,
+                                    chunk=[movement]
+                                )
+                            self.transactions += 1
+                            self.writes += 1
+                            report['inserted'].append(movement)
+                        except sqlite3.Error as row_error:
+                            offending.append(
+                                (movement, str(row_error))
+                            )
+                    report['failed'].append({
+                        'chunk': index,
+                        'error': str(e),
+                        'rows': offending
+                    })
+        report['seconds'] = time.perf_counter() - start
+        return report
+
+    def cards_version(
+            self
+    ) -> tuple:
+        return tuple(
+            self.query(
+                'SELECT COUNT(*), COALESCE(SUM(id), 0) FROM cards'
+            )[0]
+        )
+
+    def cards(
+            self
+    ) -> list[int]:
+        return [
+            int(card_id) for (card_id,) in self.query(
+                'SELECT id FROM cards'
+            )
+        ]
+
+    def add_cards(
+            self,
+            card_ids: list[int]
+    ) -> None:
+        """
+        Registers cards, MySQL databases get them from outside the app.
+        """
+        conn = self.connection()
+        with self.write_lock, conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO cards (id) VALUES (?)',
+                [(card_id,) for card_id in card_ids]
+            )
+
+    def history(
+            self
+    ) -> list[tuple[str, str, int]]:
+        """
+        Returns (counterparty, category_name, count) for every known pair.
+        """
+        return self.query(
+            """
+            SELECT counterparty, category_name, COUNT(*)
+            FROM movements
+            WHERE counterparty IS NOT NULL AND category_name IS NOT NULL
+            GROUP BY counterparty, category_name
+            """
+        )
+
+    def stats(
+            self
+    ) -> dict[str, int | float]:
+        with self.lock:
+            return {
+                'connections': len(self.connections),
+                'transactions': self.transactions,
+                'writes': self.writes
+            }
+
+    def close(
+            self
+    ) -> None:
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            with contextlib.suppress(sqlite3.Error):
+                conn.close()
+        self.local = threading.local()
+
+
+def create(
+        backend: str,
+        path: str,
+        connect: Callable[[], database.Pool]
+) -> Storage:
+    """
+    Opens the storage backend selected in config.json.
+
+    Parameters:
+        backend (str): "mysql" or "sqlite"
+        path (str): SQLite file, for the "sqlite" backend
+        connect (Callable[[], database.Pool]): Opens the MySQL pool (utils.connect_database), for the "mysql" backend
+
+    Returns:
+        Storage: The backend
+    """
+    if backend == 'sqlite':
+        return SQLiteStorage(
+            path=path
+        )
+    if backend == 'mysql':
+        return MySQLStorage(
+            pool=connect()
+        )
+    raise ValueError(f'Unknown storage backend "{backend}", expected "mysql" or "sqlite".')
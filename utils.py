@@ -1,12 +1,12 @@
 import os
-import json
 import time
 
-import mysql
 import parsers
+import storage
+import database
 
-from mysql.connector.pooling import PooledMySQLConnection
-from mysql.connector.abstracts import MySQLConnectionAbstract
+from parsers import history, registry
+from parsers.detector import BankDetector
 
 
 def clear(
@@ -66,10 +66,16 @@ def connect_database(
         mysql_user: str,
         mysql_port: int,
         mysql_password: str,
-        mysql_database: str
-) -> MySQLConnectionAbstract | PooledMySQLConnection:
+        mysql_database: str,
+        pool_size: int = 4,
+        connect_timeout: int = 10,
+        read_timeout: int = 30,
+        checkout_timeout: float = 30,
+        health_interval: float = 60,
+        local_infile: bool = False
+) -> database.Pool:
     """
-    Establishes a connection to the MySQL database.
+    Opens a pool of connections to the MySQL database.
 
     Parameters:
         mysql_host (str): Database host address
@@ -77,20 +83,33 @@ def connect_database(
         mysql_port (int): Database port number
         mysql_password (str): Database user password
         mysql_database (str): Name of the database to connect to
+        pool_size (int): Maximum number of open connections
+        connect_timeout (int): Seconds to wait for the server when opening a connection
+        read_timeout (int): Seconds to wait for the answer of a query
+        checkout_timeout (float): Seconds to wait for a free connection before failing
+        health_interval (float): Idle seconds after which a connection is pinged before reuse
+        local_infile (bool): Allow LOAD DATA LOCAL INFILE, needed by the "infile" insert mode
 
     Returns:
-        MySQLConnectionAbstract | PooledMySQLConnection: Active database connection object
+        database.Pool: Connection pool, the first connection is already open
 
-    Prints connection status message using the message() function.
+    Check connections out with pool.acquire() (close() checks them back in)
+    or the pool.connection() context manager.
     """
-    conn: PooledMySQLConnection | MySQLConnectionAbstract = mysql.connector.connect(
+    pool: database.Pool = database.Pool(
+        size=pool_size,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        checkout_timeout=checkout_timeout,
+        health_interval=health_interval,
         port=mysql_port,
         host=mysql_host,
         user=mysql_user,
         password=mysql_password,
-        database=mysql_database
+        database=mysql_database,
+        allow_local_infile=local_infile
     )
-    return conn
+    return pool
 
 
 def get_files(
@@ -189,10 +208,69 @@ def select_files(
     return result
 
 
+_detectors: dict[int, tuple[dict, BankDetector]] = {}
+
+
+def detect_bank(
+        app_info,
+        text: str
+) -> tuple[str | None, str | None, float]:
+    """
+    Finds the bank and runtype of a statement from its signature strings.
+
+    Parameters:
+        app_info: Application configuration information (loaded from config.json)
+        text (str): Lowercase statement text, only the first detector.scan_kb are read
+
+    Returns:
+        tuple[str | None, str | None, float]: The parser key, runtype and confidence, or (None, None, 0.0) if no signature matches
+
+    The signatures are compiled into a detector once per configuration.
+    """
+    parsers_info: dict = app_info['parsers']
+    if id(parsers_info) not in _detectors:
+        _detectors[id(parsers_info)] = (
+            parsers_info,
+            BankDetector(
+                parsers=parsers_info,
+                scan_chars=app_info['detector']['scan_kb'] * 1024
+            )
+        )
+    return _detectors[id(parsers_info)][1].detect(
+        text=text
+    )
+
+
+def ocr_profile(
+        app_info,
+        text: str
+) -> dict:
+    """
+    Picks the adaptive OCR settings (DPI ladder and confidence threshold) for a statement.
+
+    Parameters:
+        app_info: Application configuration information (loaded from config.json)
+        text (str): Text of the first page
+
+    Returns:
+        dict: The "ocr" entry of the detected bank in config.json, or the default ocr.adaptive settings
+    """
+    bank_key, _, _ = detect_bank(
+        app_info=app_info,
+        text=text.lower()
+    )
+    profile: dict = dict(app_info['ocr']['adaptive'])
+    if bank_key:
+        profile.update(
+            app_info['parsers'][bank_key].get('ocr', {})
+        )
+    return profile
+
+
 def parser(
         app_info,
         args: str | list[str],
-        conn: MySQLConnectionAbstract | PooledMySQLConnection | None
+        conn: storage.Storage | None
 ) -> list[
     dict[
         str,
@@ -208,7 +286,7 @@ def parser(
     Parameters:
         app_info: Application configuration information (loaded from config.json)
         args (str | list): Text content to parse or special command ('manual')
-        conn (MySQLConnectionAbstract | PooledMySQLConnection | None): Database connection object
+        conn (storage.Storage | None): Storage backend, None to run without database
 
     Returns:
         list[dict[str, str | int | float | None]] | dict[str, str | int | float | None] | None: List of parsed movements if successful, None if parsing fails
@@ -218,9 +296,6 @@ def parser(
     Uses message() function to display status and error messages.
     """
 
-    with open('config.json', 'r') as f:
-        app_info = json.load(f)
-
     bank_key: str | None = None
     bank_name: str | None = None
     movements: list[
@@ -231,23 +306,15 @@ def parser(
     ] | None = None
     bank_parameter: str | None = None
 
-    brute_text = '\n'.join(args).lower()
-    json_parse = app_info['parsers']
-    for parameter in json_parse:
-        for data in json_parse[parameter]['values']:
-            for slices in json_parse[parameter]['values'][data]:
-                if slices in brute_text:
-                    bank_key = parameter
-                    bank_name = json_parse[parameter]['name']
-                    bank_parameter = data
-                    break
-            if bank_key:
-                break
-        if bank_key:
-            break
+    bank_key, bank_parameter, _ = detect_bank(
+        app_info=app_info,
+        text='\n'.join(args).lower()
+    )
+    if bank_key:
+        bank_name = app_info['parsers'][bank_key]['name']
 
     if (
-            not bank_key or bank_key not in parsers.fetch()
+            not bank_key or bank_key not in registry.index()
     ) and args != 'manual':
         message(
             code=1004,
@@ -277,6 +344,41 @@ def parser(
             )
     return movements
 
+def correct_categories(
+        movements: list[
+            dict[
+                str,
+                str | int | float | None
+            ]
+        ]
+) -> None:
+    """
+    Lets the user fix the category of the listed movements before they are inserted.
+
+    Parameters:
+        movements (list[dict[str, str | int | float | None]]): Movements as numbered on screen (starting at 1)
+
+    Corrections are typed as "<number>=<CATEGORY>" separated by commas, an empty answer keeps everything.
+    Confirmed categories are later used to train the incremental category model.
+    """
+    answer: str = input(
+        'Corrections as "<number>=<CATEGORY>" separated by commas, or press enter to keep them: '
+    ).strip()
+
+    for correction in answer.split(','):
+        if '=' not in correction:
+            continue
+        index, category = correction.split('=', 1)
+        if index.strip().isdigit() and 0 < int(index) <= len(movements):
+            movements[int(index) - 1]['category_name'] = category.strip().upper()
+        else:
+            message(
+                module='parser',
+                code=1004,
+                args=f'No movement with number "{index.strip()}" found.'
+            )
+
+
 def insert_db(
     args:  list[
        dict[
@@ -287,43 +389,52 @@ def insert_db(
        str,
        str | int | float | None
     ],
-    conn: mysql.connector.abstracts.MySQLConnectionAbstract | mysql.connector.pooling.PooledMySQLConnection
-) -> None:
+    conn: storage.Storage,
+    chunk_size: int = 500,
+    mode: str = 'values'
+) -> dict | None:
+    """
+    Inserts the movements in chunks through the storage backend and prints the chunks that failed.
+
+    Parameters:
+        args (list[dict[str, str | int | float | None]]): Movements to insert
+        conn (storage.Storage): Storage backend
+        chunk_size (int): Movements per INSERT and transaction
+        mode (str): "values" (multi-row INSERT) or "infile" (LOAD DATA LOCAL INFILE)
+
+    Returns:
+        dict | None: The insert report (see loader.insert), None if the insert could not run
+    """
     try:
-        with conn.cursor() as cursor:
-            values = [
-                (
-                    movement['transaction_id'],
-                    movement['date'],
-                    movement['description'],
-                    movement['value'],
-                    movement['counterparty'],
-                    movement['method'],
-                    movement['banks_id'],
-                    movement['banks_name'],
-                    movement['cards_id'],
-                    movement['category_name']
-                )
-                for movement in args
-            ]
-            cursor.executemany(
-                operation="""
-                INSERT INTO movements (
-                    transaction_id, date, description, value, counterparty,
-                    method, banks_id, banks_name, cards_id, category_name
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                seq_params=values
-            )
-            conn.commit()
+        report: dict = conn.insert(
+            movements=args,
+            chunk_size=chunk_size,
+            mode=mode
+        )
+        history.index().add(
+            movements=report['inserted']
+        )
+        for failure in report['failed']:
             message(
-                module='mysql', 
-                code=-1, 
-                args=f'Operation ran successfully. {cursor.rowcount} rows affected!'
+                module=conn.name,
+                code=0,
+                args=f'Chunk {failure["chunk"]} failed ({failure["error"]}), '
+                     f'{len(failure["rows"])} rows left out: ' + '; '.join(
+                    f'{movement} -> {error}' for movement, error in failure['rows']
+                )
             )
+        message(
+            module=conn.name,
+            code=-1,
+            args=f'Operation ran successfully. {len(report["inserted"])} of {report["rows"]} rows inserted, '
+                 f'{len(report["skipped"])} already stored, '
+                 f'in {report["chunks"]} chunks ({report["rows"] / max(report["seconds"], 1e-9):.0f} rows/s)!'
+        )
+        return report
     except Exception as e:
         message(
-            module='mysql',
+            module=conn.name,
             code=0,
             args=e
-        )
\ No newline at end of file
+        )
+        return None
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import threading
+
+import ocr
+import batch
+
+from queue import Empty, Full, Queue
+from utils import message
+from storage import Storage
+
+
+class Ledger:
+    """
+    Persistent record of the PDFs already ingested, keyed by content hash.
+
+    A renamed or re-uploaded copy of a finished statement has the same hash,
+    so it is skipped even after the daemon restarts.
+    """
+
+    def __init__(
+            self,
+            path: str
+    ) -> None:
+        self.path: str = path
+        self.lock = threading.Lock()
+        self.records: dict[str, dict] = {}
+
+        if os.path.exists(self.path):
+            with open(
+                    file=self.path,
+                    mode='r',
+                    encoding='utf-8'
+            ) as f:
+                self.records = json.load(f)
+
+    def __contains__(
+            self,
+            pdf_hash: str
+    ) -> bool:
+        with self.lock:
+            return pdf_hash in self.records
+
+    def add(
+            self,
+            pdf_hash: str,
+            record: dict
+    ) -> None:
+        with self.lock:
+            self.records[pdf_hash] = record
+            os.makedirs(
+                name=os.path.dirname(self.path) or '.',
+                exist_ok=True
+            )
+            with open(
+                    file=f'{self.path}.tmp',
+                    mode='w',
+                    encoding='utf-8'
+            ) as f:
+                json.dump(
+                    obj=self.records,
+                    fp=f,
+                    indent=2
+                )
+            os.replace(
+                f'{self.path}.tmp',
+                self.path
+            )
+
+
+def scan(
+        pdf_dir: str
+) -> dict[str, tuple[float, int]]:
+    """
+    Lists the PDFs of a directory with their modification time and size.
+    """
+    return {
+        entry.path: (entry.stat().st_mtime, entry.stat().st_size)
+        for entry in os.scandir(pdf_dir)
+        if entry.is_file() and entry.name.lower().endswith('.pdf')
+    }
+
+
+def watch(
+        pdf_dir: str,
+        app_info,
+        storage: Storage | None,
+        cache: ocr.Cache | None,
+        workers: int,
+        confirm: bool,
+        stage_dir: str,
+        ledger_path: str,
+        interval: float,
+        queue_size: int,
+        stop: threading.Event | None = None
+) -> None:
+    """
+    Watches a directory and ingests every new or changed PDF until stopped.
+
+    Parameters:
+        pdf_dir (str): Directory to watch
+        app_info: Application configuration information (loaded from config.json)
+        storage (Storage | None): Storage backend, None to run without database
+        cache (ocr.Cache | None): OCR cache
+        workers (int): Number of files processed at the same time
+        confirm (bool): Insert the movements in the database instead of staging them as JSON
+        stage_dir (str): Directory the staged JSON files are written to
+        ledger_path (str): JSON file recording the processed content hashes
+        interval (float): Seconds between two scans of the directory
+        queue_size (int): Maximum number of files waiting for a worker
+        stop (threading.Event | None): Set it to stop the daemon, Ctrl+C also stops it
+
+    A file is queued once its size and modification time are the same in two
+    consecutive scans, so statements still being copied are left alone. When
+    the queue is full the scanner waits instead of reading more files, which
+    keeps a burst of uploads from exhausting memory. On stop the workers
+    finish the file they are on and exit, queued files are not in the
+    ledger and are picked up on the next start.
+    """
+    stop = stop or threading.Event()
+    if storage:
+        batch.load_history(
+            storage=storage
+        )
+    ledger = Ledger(
+        path=ledger_path
+    )
+    queue: Queue = Queue(
+        maxsize=queue_size
+    )
+
+    def worker(
+
+    ) -> None:
+        # Checks the event before every file, whatever is still queued is left for the next start.
+        while not stop.is_set():
+            try:
+                pdf_path: str = queue.get(
+                    timeout=interval
+                )
+            except Empty:
+                continue
+            try:
+                pdf_hash: str = ocr.Cache.fingerprint(
+                    pdf_path=pdf_path
+                )
+            except OSError:
+                continue
+            if pdf_hash in ledger:
+                continue
+
+            result: dict = batch.process(
+                pdf_path=pdf_path,
+                app_info=app_info,
+                storage=storage,
+                cache=cache,
+                confirm=confirm,
+                stage_dir=stage_dir
+            )
+            message(
+                module='watch',
+                code=-1,
+                args=f'{os.path.basename(pdf_path)}: {result["status"]} ({result["movements"]} movements)'
+            )
+            if not result['status'].startswith(('error', 'no parser')):
+                ledger.add(
+                    pdf_hash=pdf_hash,
+                    record={
+                        'file': pdf_path,
+                        'status': result['status'],
+                        'movements': result['movements'],
+                        'time': time.strftime('%Y-%m-%d %H:%M:%S')
+                    }
+                )
+
+    threads: list[threading.Thread] = [
+        threading.Thread(
+            target=worker,
+            daemon=True
+        ) for _ in range(max(workers, 1))
+    ]
+    for thread in threads:
+        thread.start()
+
+    message(
+        module='watch',
+        code=-1,
+        args=f'Watching "{pdf_dir}" every {interval}s, press Ctrl+C to stop.'
+    )
+
+    previous: dict[str, tuple[float, int]] = {}
+    queued: dict[str, tuple[float, int]] = {}
+    try:
+        while not stop.is_set():
+            current = scan(
+                pdf_dir=pdf_dir
+            )
+            for pdf_path, signature in current.items():
+                if previous.get(pdf_path) != signature or queued.get(pdf_path) == signature:
+                    continue
+                while not stop.is_set():
+                    try:
+                        queue.put(
+                            item=pdf_path,
+                            timeout=interval
+                        )
+                        queued[pdf_path] = signature
+                        break
+                    except Full:
+                        pass
+            previous = current
+            stop.wait(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        message(
+            module='watch',
+            code=-1,
+            args=f'Stopping, waiting for the files in progress ({queue.qsize()} queued files left for the next start)...'
+        )
+        for thread in threads:
+            thread.join()